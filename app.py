@@ -0,0 +1,189 @@
+import io
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from flask import Flask, request, render_template, jsonify
+from flask_cors import CORS
+from src.ElectricityBill.pipelines.prediction_pipeline import PredictionPipeline, MicroBatcher, ModelReloader
+from src.ElectricityBill import logging, setup_logging
+
+
+# Before the model loads, also when a WSGI server imports the app. Workers a preloading server
+# forks from this process restart logging under their own pid, see logger._after_fork
+setup_logging()
+
+
+class LatencyTracker:
+    """Sliding window of request latencies per endpoint, plus rows predicted per CPU second"""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.latencies = {}
+        self.counts = {}
+        self.rows = {}
+        self.lock = threading.Lock()
+        # Process CPU time covers the request threads, the micro-batcher and the predictor's own threads
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+
+    def record(self, endpoint: str, seconds: float, rows: int = 1):
+        with self.lock:
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.rows[endpoint] = self.rows.get(endpoint, 0) + rows
+
+    def summary(self) -> dict:
+        with self.lock:
+            snapshot = {endpoint: np.array(values) for endpoint, values in self.latencies.items()}
+            counts = dict(self.counts)
+            rows = dict(self.rows)
+        cpu_seconds = time.process_time() - self.start_cpu
+        wall_seconds = time.perf_counter() - self.start_wall
+        total_rows = sum(rows.values())
+        return {
+            "latency": {
+                endpoint: {
+                    "requests": counts[endpoint],
+                    "rows": rows[endpoint],
+                    "window": len(values),
+                    "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+                    "p99_ms": round(float(np.percentile(values, 99)) * 1000, 3),
+                    "max_ms": round(float(values.max()) * 1000, 3),
+                }
+                for endpoint, values in snapshot.items()
+            },
+            "throughput": {
+                "rows": total_rows,
+                "cpu_seconds": round(cpu_seconds, 3),
+                "wall_seconds": round(wall_seconds, 3),
+                "cpu_count": os.cpu_count(),
+                "rows_per_cpu_second": round(total_rows / cpu_seconds, 1) if cpu_seconds > 0 else None,
+            },
+        }
+
+
+app = Flask(__name__)
+CORS(app)
+
+# Loaded once per process and only replaced by a validated reload, every request reuses it
+prediction_pipeline = PredictionPipeline()
+config = prediction_pipeline.config
+reloader = ModelReloader(
+    prediction_pipeline,
+    poll_seconds=config.reload_poll_seconds,
+    canary_path=config.canary_path,
+    canary_rows=config.canary_rows
+)
+latency_tracker = LatencyTracker(config.latency_window)
+micro_batcher = None
+if config.micro_batching:
+    micro_batcher = MicroBatcher(prediction_pipeline, max_batch_size=config.max_batch_size, max_wait_ms=config.max_wait_ms)
+    reloader.listeners.append(lambda pipeline: setattr(micro_batcher, "pipeline", pipeline))
+if config.hot_reload:
+    reloader.watch()
+
+
+@app.route("/", methods=["GET"])
+def home():
+    return render_template("home.html")
+
+
+@app.route("/predict", methods=["GET", "POST"])
+def predict_form():
+    # One pipeline for the whole request, even if a reload swaps it meanwhile
+    pipeline = reloader.pipeline
+    if request.method == "GET":
+        return render_template("index.html", columns=pipeline.feature_columns, categories=pipeline.categories())
+
+    start = time.perf_counter()
+    try:
+        record = {col: request.form.get(col) for col in pipeline.feature_columns}
+        prediction = float(pipeline.predict([record])[0])
+    except ValueError as e:
+        return render_template("index.html", columns=pipeline.feature_columns,
+                               categories=pipeline.categories(), error=str(e), values=request.form), 400
+    latency_tracker.record("predict_form", time.perf_counter() - start)
+    return render_template("results.html", prediction=round(prediction, 2), record=record, model_version=pipeline.version)
+
+
+@app.route("/api/predict", methods=["POST"])
+def predict_json():
+    start = time.perf_counter()
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify({"error": "Expected a JSON object with one value per schema column"}), 400
+    try:
+        if micro_batcher is not None:
+            prediction, version = micro_batcher.predict(record)
+        else:
+            pipeline = reloader.pipeline
+            prediction, version = float(pipeline.predict([record])[0]), pipeline.version
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    latency = time.perf_counter() - start
+    latency_tracker.record("predict_json", latency)
+    return jsonify({"prediction": prediction, "model_version": version, "latency_ms": round(latency * 1000, 3)})
+
+
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """Predicts a JSON array of records or a CSV upload (form field "file" or a text/csv body)"""
+    start = time.perf_counter()
+    pipeline = reloader.pipeline
+    try:
+        if "file" in request.files:
+            records = pd.read_csv(request.files["file"])
+        elif request.mimetype == "text/csv":
+            records = pd.read_csv(io.BytesIO(request.get_data()))
+        else:
+            records = request.get_json(silent=True)
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                return jsonify({"error": "Expected a JSON array of records (objects) or a CSV upload"}), 400
+        if len(records) == 0:
+            return jsonify({"error": "No records to predict"}), 400
+        if len(records) > pipeline.config.max_batch_rows:
+            return jsonify({"error": f"At most {pipeline.config.max_batch_rows} records per request"}), 413
+        predictions = pipeline.predict(records)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    latency = time.perf_counter() - start
+    latency_tracker.record("predict_batch", latency, rows=len(predictions))
+    return jsonify({
+        "predictions": predictions.tolist(),
+        "rows": len(predictions),
+        "model_version": pipeline.version,
+        "latency_ms": round(latency * 1000, 3),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    summary = latency_tracker.summary()
+    if micro_batcher is not None:
+        summary["micro_batching"] = micro_batcher.summary()
+    if reloader.pipeline.cache is not None:
+        summary["cache"] = reloader.pipeline.cache.stats()
+    summary["model"] = reloader.summary()
+    return jsonify(summary)
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Reloads the model from disk in a background thread (202), or in the request with ?wait=1.
+    ?force=1 reloads even if the artifact files did not change
+    """
+    force = request.args.get("force") == "1"
+    if request.args.get("wait") == "1":
+        result = reloader.reload(force=force)
+        return jsonify(result), 500 if result["status"] == "failed" else 200
+    threading.Thread(target=reloader.reload, kwargs={"force": force}, name="model-reload", daemon=True).start()
+    return jsonify({"status": "reloading", "version": reloader.pipeline.version}), 202
+
+
+if __name__ == "__main__":
+    logging.info("Starting the prediction server")
+    app.run(host="0.0.0.0", port=8080)
@@ -0,0 +1,31 @@
+import argparse
+import dataclasses
+from src.ElectricityBill import logging, setup_logging
+from src.ElectricityBill.config.configuration import ConfigurationManager
+from src.ElectricityBill.pipelines.batch_prediction_pipeline import BatchPredictionPipeline
+
+
+parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of customers with the trained model")
+parser.add_argument("input", help="CSV or Parquet file with the schema.yaml columns")
+parser.add_argument("output", help="Output file, Parquet if it ends in .parquet, CSV otherwise")
+parser.add_argument("--chunk-size", type=int, help="Rows per chunk (config.yaml batch_prediction.chunk_size)")
+parser.add_argument("--workers", type=int, help="Worker processes, 0 scores in this process (batch_prediction.n_workers)")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging()
+    config_manager = ConfigurationManager()
+    config = config_manager.get_batch_prediction_config()
+    if args.chunk_size is not None:
+        config = dataclasses.replace(config, chunk_size=args.chunk_size)
+    if args.workers is not None:
+        config = dataclasses.replace(config, n_workers=args.workers)
+
+    try:
+        logging.info(f"Batch scoring {args.input} with {config.n_workers} workers, {config.chunk_size} rows per chunk")
+        summary = BatchPredictionPipeline(config, config_manager.get_prediction_config()).run(args.input, args.output)
+        logging.info(f"Scored {summary['rows']} rows in {summary['seconds']}s ({summary['rows_per_second']} rows/s)")
+    except Exception as e:
+        logging.exception(e)
+        raise e
@@ -1,37 +1,58 @@
-from src.ElectricityBill import logging
+import argparse
+from src.ElectricityBill import logging, setup_logging
+from src.ElectricityBill.config.configuration import ConfigurationManager
 from src.ElectricityBill.pipelines.stage_01_data_ingestion import DataIngestionPipeline
-from src.ElectricityBill.pipelines.stage_02_data_validation import DataValidationPipeline
+from src.ElectricityBill.pipelines.stage_02_data_validation import DataValidationPipeline, DataProfilingPipeline
 from src.ElectricityBill.pipelines.stage_03_data_transformation import DataTransformationPipeline
+from src.ElectricityBill.pipelines.stage_04_model_trainer import ModelTrainerPipeline
+from src.ElectricityBill.pipelines.stage_05_model_evaluation import ModelEvaluationPipeline
+from src.ElectricityBill.utils.dag import DagRunner
 
 
-STAGE_NAME = "Data Ingestion Stage"
-try:
-    logging.info(f"++++++++++++++++++++++ {STAGE_NAME} started ++++++++++++++++++++++++++")
-    data_ingestion = DataIngestionPipeline()
-    data_ingestion.main()
-    logging.info(f"*************** stage {STAGE_NAME} completed ****************\n\nx================x")
-except Exception as e:
-    logging.exception(e)
-    raise e
-
-
-STAGE_NAME = "Data Validation Stage"
-try:
-    logging.info(f"++++++++++++++++++++++ {STAGE_NAME} started ++++++++++++++++++++++++++")
-    data_ingestion = DataValidationPipeline()
-    data_ingestion.main()
-    logging.info(f"*************** stage {STAGE_NAME} completed ****************\n\nx================x")
-except Exception as e:
-    logging.exception(e)
-    raise e
-
-
-STAGE_NAME = "Data Transformation stage"
-try:
-   logging.info(f">>>>>> stage {STAGE_NAME} started <<<<<<") 
-   data_ingestion = DataTransformationPipeline()
-   data_ingestion.main()
-   logging.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
+# Stage names used in config.yaml pipeline.stages
+STAGES = {
+    "data_ingestion": DataIngestionPipeline,
+    "data_validation": DataValidationPipeline,
+    "data_profiling": DataProfilingPipeline,
+    "data_transformation": DataTransformationPipeline,
+    "model_trainer": ModelTrainerPipeline,
+    "model_evaluation": ModelEvaluationPipeline,
+}
+
+
+parser = argparse.ArgumentParser(description="Run the Electricity Bill training pipeline")
+parser.add_argument(
+    "--force",
+    nargs="+",
+    default=[],
+    choices=list(STAGES) + ["all"],
+    help="Rerun these stages even when the stage cache says they are up to date"
+)
+parser.add_argument("--from", dest="from_stage", choices=list(STAGES), help="Start at this stage, earlier stages' artifacts are read from disk")
+parser.add_argument("--to", dest="to_stage", choices=list(STAGES), help="Stop after this stage and the stages it depends on")
+
+
+def stage_runner(name: str, force: set):
+    def run(**inputs):
+        return STAGES[name](force=bool(force & {name, "all"})).main(**inputs)
+    return run
+
+
+# Guarded, the stages' process pools start their workers by importing this module
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging()
+    force = set(args.force)
+    try:
+        pipeline_config = ConfigurationManager().get_pipeline_config()
+        runner = DagRunner(
+            pipeline_config.stages,
+            runners={stage.name: stage_runner(stage.name, force) for stage in pipeline_config.stages},
+            max_workers=pipeline_config.max_workers
+        )
+        selected = runner.select(args.from_stage, args.to_stage)
+        logging.info(f"Running stages {selected}")
+        runner.run(selected)
+    except Exception as e:
         logging.exception(e)
-        raise e
\ No newline at end of file
+        raise e
@@ -1,10 +1,55 @@
 import os
+import json
+import time
+import shutil
+import hashlib
+import http.client
+import urllib.error
 import urllib.request as request
 import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 from src.ElectricityBill import logging
 from src.ElectricityBill.utils.commons import get_size
+from src.ElectricityBill.utils.profiling import add_rows
 from src.ElectricityBill.entity.config_entity import DataIngestionConfig
-from pathlib import Path 
+from pathlib import Path
+
+
+# Arrow types for the dtypes used in schema.yaml, object columns become dictionary encoded categoricals
+SCHEMA_ARROW_TYPES = {
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "object": pa.string(),
+}
+
+# Cells read as null in every column, strings included, so a blank City is missing and not a "" category
+CSV_NULL_VALUES = ["", "NA", "N/A", "NULL", "NaN", "nan", "null"]
+
+# Cells of a numeric column that did not parse, kept in the Parquet footer for the dtype check of data validation
+DTYPE_ERRORS_KEY = "electricitybill_dtype_errors"
+
+
+def cast_column(values: pa.Array, arrow_type: pa.DataType):
+    """
+    Casts a column read as text to arrow_type. Cells that do not parse as that type become null
+    instead of failing the whole conversion.
+    Function returns the cast column and the cells that did not parse
+    """
+    try:
+        return pc.cast(values, arrow_type), []
+    except pa.ArrowInvalid:
+        pass
+    # Slow path, only for the blocks holding a bad cell
+    raw = values.to_pandas()
+    parsed = pd.to_numeric(raw, errors="coerce")
+    invalid = raw.notna() & parsed.isna()
+    if pa.types.is_integer(arrow_type):
+        invalid |= parsed.notna() & (parsed % 1 != 0)
+    return pa.array(parsed.where(~invalid), type=arrow_type, from_pandas=True), raw[invalid].tolist()
 
 
 class DataIngestion:
@@ -12,29 +57,249 @@ class DataIngestion:
         self.config = config
 
 
-    
+
     def download_file(self):
-        if not os.path.exists(self.config.local_data_file):
-            filename, headers = request.urlretrieve(
-                url = self.config.source_URL,
-                filename = self.config.local_data_file
-            )
-            logging.info(f"{filename} download! with following info: \n{headers}")
-        else:
-            logging.info(f"File already exists of size: {get_size(Path(self.config.local_data_file))}")
+        """
+        Streams source_URL to local_data_file in chunks.
+        The download goes to a .part file that is resumed with an HTTP Range request
+        after a failure, verified against expected_sha256/expected_size and only then
+        renamed into place, so a killed job never leaves a partial data.zip behind.
+        Function returns None
+        """
+        local_data_file = str(self.config.local_data_file)
+
+        if os.path.exists(local_data_file):
+            if self._verify_file(local_data_file):
+                logging.info(f"File already exists of size: {get_size(Path(local_data_file))}")
+                return
+            logging.warning(f"{local_data_file} does not match the expected checksum/size, downloading again")
+            os.remove(local_data_file)
+
+        part_file = f"{local_data_file}.part"
+        for attempt in range(1, self.config.max_retries + 1):
+            try:
+                self._stream_download(part_file)
+                break
+            except urllib.error.HTTPError as e:
+                # Client errors will not go away by retrying
+                if e.code < 500 or attempt == self.config.max_retries:
+                    raise e
+                logging.warning(f"Download attempt {attempt} failed: {e}")
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                if attempt == self.config.max_retries:
+                    raise e
+                logging.warning(f"Download attempt {attempt} failed: {e}")
+
+            backoff = self.config.backoff_seconds * 2 ** (attempt - 1)
+            logging.info(f"Retrying download in {backoff}s")
+            time.sleep(backoff)
+
+        if not self._verify_file(part_file):
+            os.remove(part_file)
+            raise ValueError(f"Downloaded file from {self.config.source_URL} failed the checksum/size check")
+
+        os.replace(part_file, local_data_file)
+        logging.info(f"{local_data_file} downloaded, size: {get_size(Path(local_data_file))}")
+
+
+    def _stream_download(self, part_file: str):
+        """Download into part_file, resuming from its current size"""
+        offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        req = request.Request(self.config.source_URL)
+        if offset:
+            req.add_header("Range", f"bytes={offset}-")
+
+        try:
+            response = request.urlopen(req, timeout=self.config.timeout)
+        except urllib.error.HTTPError as e:
+            # 416: the part file already holds the whole resource
+            if e.code == 416 and offset:
+                logging.info("Server reports nothing left to download")
+                return
+            raise e
+
+        with response:
+            if offset and response.status != 206:
+                # The server ignored the Range header and is sending the whole file
+                logging.info("Server does not support resuming, restarting download")
+                offset = 0
+            elif offset:
+                logging.info(f"Resuming download at byte {offset}")
+
+            content_length = response.headers.get("Content-Length")
+            expected_total = offset + int(content_length) if content_length is not None else None
+
+            written = 0
+            start = time.perf_counter()
+            with open(part_file, "ab" if offset else "wb") as f:
+                while True:
+                    chunk = response.read(self.config.chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    written += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        throughput = written / (1024 * 1024) / elapsed if elapsed > 0 else float("inf")
+        logging.info(f"Downloaded {written} bytes in {elapsed:.2f}s ({throughput:.2f} MB/s)")
+
+        if expected_total is not None and offset + written < expected_total:
+            raise http.client.IncompleteRead(b"", expected_total - offset - written)
+
+
+    def _verify_file(self, path: str) -> bool:
+        """Check a file against the expected size and sha256 from the config"""
+        if self.config.expected_size is not None and os.path.getsize(path) != self.config.expected_size:
+            logging.warning(f"{path} size {os.path.getsize(path)} != expected {self.config.expected_size}")
+            return False
+
+        if self.config.expected_sha256:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.config.chunk_size), b""):
+                    digest.update(chunk)
+            if digest.hexdigest() != self.config.expected_sha256.lower():
+                logging.warning(f"{path} sha256 {digest.hexdigest()} != expected {self.config.expected_sha256}")
+                return False
+
+        return True
 
 
 
-    
     def extract_zip_file(self):
         """
         zip_file_path: str
-        Extracts the zip file into the data directory
-        Function returns None
+        Extracts the configured members (all members when none are listed) into the data directory.
+        A manifest of member name, CRC32 and size is kept so members whose CRC did not change
+        are not rewritten, and members are streamed to disk in chunk_size pieces.
+        Function returns the list of extracted file paths
         """
         unzip_path = self.config.unzip_dir
         os.makedirs(unzip_path, exist_ok=True)
+        manifest_path = self.config.extract_manifest or os.path.join(unzip_path, "extract_manifest.json")
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+        extracted_files = []
         with zipfile.ZipFile(self.config.local_data_file, 'r') as zip_ref:
-            zip_ref.extractall(unzip_path)
+            members = [info for info in zip_ref.infolist() if not info.is_dir()]
+            if self.config.members:
+                missing = set(self.config.members) - {info.filename for info in members}
+                if missing:
+                    raise ValueError(f"Members {sorted(missing)} not found in {self.config.local_data_file}")
+                members = [info for info in members if info.filename in self.config.members]
+
+            for info in members:
+                target = self._member_path(unzip_path, info.filename)
+                extracted_files.append(target)
+
+                entry = manifest.get(info.filename)
+                if (
+                    entry is not None
+                    and entry["crc"] == info.CRC
+                    and entry["size"] == info.file_size
+                    and os.path.exists(target)
+                    and os.path.getsize(target) == info.file_size
+                ):
+                    logging.info(f"{info.filename} unchanged (crc {info.CRC:08x}), skipping extraction")
+                    continue
+
+                # Stream the member through a temporary file, ZipExtFile checks the CRC at the end
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp_target = f"{target}.part"
+                with zip_ref.open(info) as src, open(tmp_target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, self.config.chunk_size)
+                os.replace(tmp_target, target)
+
+                manifest[info.filename] = {"crc": info.CRC, "size": info.file_size, "path": target}
+                logging.info(f"Extracted {info.filename} to {target}")
+
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+
+        return extracted_files
+
+
+    @staticmethod
+    def _member_path(unzip_path, member_name: str) -> str:
+        """Resolve a member to a path inside unzip_path, rejecting entries that escape it"""
+        root = os.path.realpath(unzip_path)
+        target = os.path.realpath(os.path.join(root, member_name))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f"Refusing to extract {member_name} outside {unzip_path}")
+        return target
+
+
+    def convert_to_parquet(self):
+        """
+        Converts the extracted CSV to a Parquet file once, typed with the dtypes declared in
+        schema.yaml COLUMNS and with object columns (City, Company) dictionary encoded.
+        The CSV is streamed block by block, and the conversion is skipped when the Parquet file
+        was already written from the same CSV and schema. Numeric cells that do not parse as their
+        dtype are stored as null and counted per column in the Parquet footer, where data validation
+        reports them as dtype violations.
+        Function returns the Parquet file path
+        """
+        csv_file = str(self.config.csv_file)
+        parquet_file = str(self.config.parquet_file)
+        schema = dict(self.config.all_schema or {})
+
+        stat = os.stat(csv_file)
+        source = json.dumps(
+            {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "schema": schema, "null_values": CSV_NULL_VALUES},
+            sort_keys=True
+        )
+        if os.path.exists(parquet_file):
+            metadata = pq.read_schema(parquet_file).metadata or {}
+            if metadata.get(b"electricitybill_source") == source.encode():
+                logging.info(f"{parquet_file} is up to date with {csv_file}, skipping conversion")
+                return parquet_file
+
+        # Every schema column is read as text and cast per block, so one bad cell does not abort the read
+        reader = pv.open_csv(
+            csv_file,
+            read_options=pv.ReadOptions(block_size=self.config.chunk_size),
+            convert_options=pv.ConvertOptions(
+                column_types={col: pa.string() for col in schema}, null_values=CSV_NULL_VALUES, strings_can_be_null=True
+            )
+        )
+        numeric_cols = {col: SCHEMA_ARROW_TYPES[dtype] for col, dtype in schema.items() if dtype != "object"}
+
+        # Object columns are stored as dictionary encoded strings so pandas reads them back as categoricals
+        fields = [
+            pa.field(field.name, pa.dictionary(pa.int32(), pa.string())) if schema.get(field.name) == "object"
+            else pa.field(field.name, numeric_cols[field.name]) if field.name in numeric_cols
+            else field
+            for field in reader.schema
+        ]
+        target_schema = pa.schema(fields, metadata={"electricitybill_source": source})
+
+        tmp_file = f"{parquet_file}.part"
+        rows = 0
+        dtype_errors = {}
+        with pq.ParquetWriter(tmp_file, target_schema) as writer:
+            for batch in reader:
+                table = pa.Table.from_batches([batch])
+                for col, arrow_type in numeric_cols.items():
+                    if col not in table.column_names:
+                        continue
+                    index = table.column_names.index(col)
+                    values, invalid = cast_column(table.column(index).combine_chunks(), arrow_type)
+                    table = table.set_column(index, col, values)
+                    if invalid:
+                        errors = dtype_errors.setdefault(col, {"count": 0, "examples": []})
+                        errors["count"] += len(invalid)
+                        errors["examples"] = (errors["examples"] + invalid)[:5]
+                writer.write_table(table.cast(target_schema))
+                rows += batch.num_rows
+            writer.add_key_value_metadata({DTYPE_ERRORS_KEY: json.dumps(dtype_errors)})
+        os.replace(tmp_file, parquet_file)
+        add_rows(rows)
 
+        if dtype_errors:
+            logging.warning(f"Cells that do not parse as their schema dtype were stored as null: {dtype_errors}")
 
+        logging.info(f"Converted {csv_file} to {parquet_file} ({rows} rows, size: {get_size(Path(parquet_file))})")
+        return parquet_file
@@ -3,14 +3,21 @@ import os
 from src.ElectricityBill import logging 
 from sklearn.model_selection import train_test_split
 import pandas as pd 
-import joblib
+import pyarrow as pa
+import pyarrow.parquet as pq
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from pathlib import Path
 
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline 
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 
-from src.ElectricityBill.utils.commons import save_object
+from src.ElectricityBill.utils.commons import save_object, save_json, save_matrix, load_matrix, MatrixWriter, NpyAppender, atomic_write
+from src.ElectricityBill.utils.sketches import NumericSketch, CategoricalSketch
+from src.ElectricityBill.utils.profiling import step, add_rows
 from src.ElectricityBill.entity.config_entity import DataTransformationConfig
 
 class DataTransformation:
@@ -45,7 +52,9 @@ class DataTransformation:
                     ('numerical', numerical_transformer, numerical_cols),
                     ('categorical', categorical_transformer, categorical_cols)
                 ],
-                remainder='passthrough'
+                remainder='passthrough',
+                # Keep the one-hot City/Company blocks sparse instead of densifying the output
+                sparse_threshold=1.0
             )
             
             return preprocessor
@@ -54,93 +63,229 @@ class DataTransformation:
             logging.error(f"Error in get_transformer_obj: {e}")
             raise e
 
-    def train_test_splitting(self):
-        df = pd.read_csv(self.config.data_path)
-        X = df.drop(columns=["ElectricityBill"])
-        y = df["ElectricityBill"]
+    def save_train_rows(self, positions) -> str:
+        """Save the sorted row positions of the training split in data_path as train_rows.npy"""
+        path = os.path.join(self.config.root_dir, "train_rows.npy")
+        with atomic_write(path) as f:
+            np.save(f, np.sort(np.asarray(positions, dtype="int64")))
+        return path
 
-        # Split the data into training and test sets with a 75/25 split
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42)
 
-        # Create DataFrames for training and test sets
-        train_df = pd.concat([X_train, y_train], axis=1)
-        test_df = pd.concat([X_test, y_test], axis=1)
+    def save_transformed(self, X_transformed, y, split: str) -> list:
+        """Save a transformed split as <split>_transformed/ (sparse or dense .npy arrays) and y_<split>.npy"""
+        written = save_matrix(X_transformed, os.path.join(self.config.root_dir, f"{split}_transformed"))
+        y_path = os.path.join(self.config.root_dir, f"y_{split}.npy")
+        np.save(y_path, np.asarray(y, dtype="float64"))
+        return written + [y_path]
 
-        # Save training and test sets to CSV files
-        train_df.to_csv(os.path.join(self.config.root_dir, "train.csv"), index=False)
-        test_df.to_csv(os.path.join(self.config.root_dir, "test.csv"), index=False)
 
-        logging.info("Split data into training and test sets")
-        logging.info(f"Training set shape: {train_df.shape}")
-        logging.info(f"Test set shape: {test_df.shape}")
+    def fit_transformer_from_batches(self, batches):
+        """
+        Fits the ColumnTransformer from an iterable of Arrow record batches in a single pass.
+        Medians come from a quantile sketch, scaler moments from Chan/Welford updates (adjusted for
+        the median-imputed nulls) and most frequent values and categories from count tables.
+        The pipeline is fitted on a tiny proxy frame holding every category and its statistics are
+        then set from the sketches, so the result is the same ColumnTransformer as the in-memory fit.
+        Function returns the fitted preprocessor
+        """
+        numerical_cols = self.config.numerical_cols
+        categorical_cols = self.config.categorical_cols
+        feature_cols = [col for col in self.config.columns if col != self.config.target_column]
 
-        print(f"Training set shape: {train_df.shape}")
-        print(f"Test set shape: {test_df.shape}")
+        numerical_sketches = {col: NumericSketch(self.config.sketch_size) for col in numerical_cols}
+        categorical_sketches = {col: CategoricalSketch() for col in categorical_cols}
+        rows = 0
+        for batch in batches:
+            rows += batch.num_rows
+            for col, sketch in numerical_sketches.items():
+                sketch.update(batch.column(col).to_numpy(zero_copy_only=False))
+            for col, sketch in categorical_sketches.items():
+                sketch.update(batch.column(col).to_pandas())
+
+        medians = np.array([sketch.quantile(0.5) for sketch in numerical_sketches.values()])
+        means = np.empty(len(numerical_cols))
+        variances = np.empty(len(numerical_cols))
+        for i, sketch in enumerate(numerical_sketches.values()):
+            # The scaler sees the nulls as median values: merge them in as a zero variance group
+            delta = medians[i] - sketch.mean
+            means[i] = sketch.mean + delta * sketch.null_count / rows
+            variances[i] = (sketch.m2 + delta ** 2 * sketch.count * sketch.null_count / rows) / rows
+        scales = np.sqrt(variances)
+        scales[scales < 10 * np.finfo(scales.dtype).eps] = 1.0
+
+        empty = [col for col, sketch in categorical_sketches.items() if not sketch.categories()]
+        if empty:
+            raise ValueError(f"Categorical columns {empty} are null in every training row, the one-hot encoder has no category to learn")
+        modes = np.array([sketch.most_frequent() for sketch in categorical_sketches.values()], dtype=object)
+        vocabularies = [sketch.categories() for sketch in categorical_sketches.values()]
+
+        # A proxy frame with every category lets OneHotEncoder learn the same vocabulary
+        n_proxy = max([1] + [len(vocab) for vocab in vocabularies])
+        proxy = pd.DataFrame({col: np.zeros(n_proxy) for col in feature_cols})
+        for i, col in enumerate(numerical_cols):
+            proxy[col] = medians[i]
+        for col, vocab in zip(categorical_cols, vocabularies):
+            proxy[col] = [vocab[i % len(vocab)] for i in range(n_proxy)]
+
+        preprocessor = self.get_transformer_obj()
+        preprocessor.fit(proxy)
+
+        numerical = preprocessor.named_transformers_["numerical"]
+        numerical.named_steps["imputer"].statistics_ = medians
+        scaler = numerical.named_steps["scaler"]
+        scaler.mean_ = means
+        scaler.var_ = variances
+        scaler.scale_ = scales
+        scaler.n_samples_seen_ = rows
+        preprocessor.named_transformers_["categorical"].named_steps["imputer"].statistics_ = modes
+
+        logging.info(f"Fitted preprocessor from {rows} rows in chunks of {self.config.chunk_size}")
+        return preprocessor
+
+
+    def save_preprocessor(self, preprocessor_obj):
+        """Save the fitted preprocessor and its output feature names"""
+        save_json(
+            path=Path(os.path.join(self.config.root_dir, "feature_names.json")),
+            data={"feature_names": preprocessor_obj.get_feature_names_out().tolist()}
+        )
+        save_object(
+            obj = preprocessor_obj,
+            file_path = os.path.join(self.config.root_dir, "preprocessor_obj.joblib")
+        )
+
+
+    def load_transformed(self):
+        """Memory-map the transformed matrices and targets written to root_dir"""
+        X_train_transformed = load_matrix(os.path.join(self.config.root_dir, "train_transformed"))
+        X_test_transformed = load_matrix(os.path.join(self.config.root_dir, "test_transformed"))
+        y_train = np.load(os.path.join(self.config.root_dir, "y_train.npy"), mmap_mode="r")
+        y_test = np.load(os.path.join(self.config.root_dir, "y_test.npy"), mmap_mode="r")
+
+        logging.info("Data transformation completed")
+        logging.info(f"Training set shape: {X_train_transformed.shape}")
+        logging.info(f"Test set shape: {X_test_transformed.shape}")
+
+        return X_train_transformed, X_test_transformed, y_train, y_test
+
+
+    def split_and_transform(self):
+        """
+        Splits the dataset and fits/transforms it in a single read, without the train/test CSV
+        round trip. In memory mode the frames are split and transformed in place; in streaming mode
+        rows are assigned to train/test per chunk with a seeded generator (test_size is then the
+        expected fraction) and the fit and transform passes stream over the dataset.
+        With persist_splits, train.parquet/test.parquet are written on a background thread
+        while the preprocessor is being fitted.
+        Function returns X_train_transformed, X_test_transformed, y_train, y_test
+        """
+        if self.config.fit_mode == "streaming":
+            with step("split_and_transform_streaming"):
+                return self.split_and_transform_streaming()
+
+        with step("read_parquet"):
+            df = pd.read_parquet(self.config.data_path, columns=self.config.columns)
+            # Row positions in the file, saved for the training split below
+            df.index = pd.RangeIndex(len(df))
+            add_rows(len(df))
+        X = df.drop(columns=[self.config.target_column])
+        y = df[self.config.target_column]
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=self.config.test_size, random_state=self.config.random_state
+        )
+        logging.info(f"Training set shape: {X_train.shape}, test set shape: {X_test.shape}")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            persisted = None
+            if self.config.persist_splits:
+                persisted = executor.submit(self.persist_splits, X_train, X_test, y_train, y_test)
 
-        return X_train, X_test, y_train, y_test
-    
-    # # Initiate data transformation
-    def initiate_data_transformation(self, train_path, test_path):
-        try:
-            # Load the train and test data
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
-            # If paths are not provided, construct them
-            # if train_path is None:
-            #     train_path = os.path.join(self.config.root_dir, "train.csv")
-            # if test_path is None:
-            #     test_path = os.path.join(self.config.root_dir, "test.csv")
-
-            # Load the train and test data
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
-
-            # Check the structure of train_df
-            print(train_df.head())
-
-            # Check the column names
-            print(train_df.columns)
-
-            # Get the transformer object
             preprocessor_obj = self.get_transformer_obj()
+            with step("fit_transform", rows=len(X_train)):
+                X_train_transformed = preprocessor_obj.fit_transform(X_train)
+            with step("transform", rows=len(X_test)):
+                X_test_transformed = preprocessor_obj.transform(X_test)
 
-            # Split the data into features (X) and target (y)
-            X_train = train_df.drop(columns=["ElectricityBill"])
-            y_train = train_df["ElectricityBill"]
-            X_test = test_df.drop(columns=["ElectricityBill"])
-            y_test = test_df["ElectricityBill"]
+            with step("save_transformed", rows=len(X_train) + len(X_test)):
+                self.save_transformed(X_train_transformed, y_train, "train")
+                self.save_transformed(X_test_transformed, y_test, "test")
+                self.save_train_rows(X_train.index.to_numpy())
+                self.save_preprocessor(preprocessor_obj)
 
+            if persisted is not None:
+                persisted.result()
 
-            # Get the transformer object
-            #preprocessor_obj = self.get_transformer_obj()
+        logging.info("Data transformation completed")
+        logging.info(f"Training set shape: {X_train_transformed.shape}")
+        logging.info(f"Test set shape: {X_test_transformed.shape}")
 
-            # Transform the training and test data
-            X_train_transformed = preprocessor_obj.fit_transform(X_train)
-            X_test_transformed = preprocessor_obj.transform(X_test)
+        return X_train_transformed, X_test_transformed, y_train, y_test
 
-            # Save the transformed training and test data
-            pd.DataFrame(X_train_transformed).to_csv(os.path.join(self.config.root_dir, "train_transformed.csv"), index=False)
-            pd.DataFrame(X_test_transformed).to_csv(os.path.join(self.config.root_dir, "test_transformed.csv"), index=False)
 
-             # Save the preprocessing object
-            #joblib.dump(preprocessor_obj, os.path.join(self.config.root_dir, "preprocessor_obj.joblib"))
+    def persist_splits(self, X_train, X_test, y_train, y_test):
+        """Write the in-memory splits to train.parquet/test.parquet"""
+        pd.concat([X_train, y_train], axis=1).to_parquet(os.path.join(self.config.root_dir, "train.parquet"), index=False)
+        pd.concat([X_test, y_test], axis=1).to_parquet(os.path.join(self.config.root_dir, "test.parquet"), index=False)
+        logging.info(f"Train and test splits saved at: {self.config.root_dir}")
 
-            # Save the preprocessing object 
-            save_object(
-                obj = preprocessor_obj,
-                file_path = os.path.join(self.config.root_dir, "preprocessor_obj.joblib")
-            )
 
+    def split_batches(self):
+        """
+        Yield (train, test, train positions) per record batch of the dataset, rows assigned with a
+        seeded generator. The positions are the training rows' row numbers in data_path
+        """
+        rng = np.random.default_rng(self.config.random_state)
+        parquet_file = pq.ParquetFile(self.config.data_path)
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=self.config.chunk_size, columns=self.config.columns):
+            is_test = rng.random(batch.num_rows) < self.config.test_size
+            yield batch.filter(pa.array(~is_test)), batch.filter(pa.array(is_test)), offset + np.flatnonzero(~is_test)
+            offset += batch.num_rows
 
-            logging.info("Data transformation completed")
-            logging.info(f"Training set shape: {X_train_transformed.shape}")
-            logging.info(f"Test set shape: {X_test_transformed.shape}")
 
-            print(f"Training set shape: {X_train_transformed.shape}")
-            print(f"Test set shape: {X_test_transformed.shape}")
+    def split_and_transform_streaming(self):
+        """Streaming variant of split_and_transform, returns memory-mapped results"""
+        # Pass 1: fit on the training rows only
+        preprocessor_obj = self.fit_transformer_from_batches(train for train, _, _ in self.split_batches())
 
-            return X_train_transformed, X_test_transformed, y_train, y_test
+        # Pass 2: the same seeded assignment, transformed chunk by chunk to disk
+        matrix_writers = {split: MatrixWriter(os.path.join(self.config.root_dir, f"{split}_transformed")) for split in ("train", "test")}
+        y_writers = {split: NpyAppender(os.path.join(self.config.root_dir, f"y_{split}.npy"), "float64") for split in ("train", "test")}
+        train_rows = NpyAppender(os.path.join(self.config.root_dir, "train_rows.npy"), "int64")
+        split_writers = {}
 
-        except Exception as e:
-            logging.error(f"Error in initiate_data_transformation: {e}")
-            raise e
\ No newline at end of file
+        def write_split(split, batch):
+            # Runs on the single background thread, so the Parquet writers are never shared
+            if split not in split_writers:
+                split_writers[split] = pq.ParquetWriter(os.path.join(self.config.root_dir, f"{split}.parquet.part"), batch.schema)
+            split_writers[split].write_batch(batch)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = deque()
+            for train, test, positions in self.split_batches():
+                train_rows.append(positions)
+                for split, batch in zip(("train", "test"), (train, test)):
+                    if not batch.num_rows:
+                        continue
+                    chunk = batch.to_pandas()
+                    matrix_writers[split].append(preprocessor_obj.transform(chunk.drop(columns=[self.config.target_column])))
+                    y_writers[split].append(chunk[self.config.target_column].to_numpy())
+
+                    if self.config.persist_splits:
+                        pending.append(executor.submit(write_split, split, batch))
+                        # Bound the number of batches waiting for the writer thread
+                        while len(pending) > 4:
+                            pending.popleft().result()
+
+            for future in pending:
+                future.result()
+            for split, writer in split_writers.items():
+                writer.close()
+                os.replace(os.path.join(self.config.root_dir, f"{split}.parquet.part"), os.path.join(self.config.root_dir, f"{split}.parquet"))
+
+        for split in ("train", "test"):
+            matrix_writers[split].close()
+            y_writers[split].close()
+        train_rows.close()
+        self.save_preprocessor(preprocessor_obj)
+        return self.load_transformed()
@@ -1,7 +1,63 @@
-import os 
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from src.ElectricityBill import logging
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.ElectricityBill.utils.commons import save_json, process_pool_context
+from src.ElectricityBill.utils.sketches import NumericSketch, CategoricalSketch
+from src.ElectricityBill.components.data_ingestion import DTYPE_ERRORS_KEY
 from src.ElectricityBill.entity.config_entity import DataValidationConfig
+from pathlib import Path
+
+
+# Arrow type checks for the dtypes used in schema.yaml
+SCHEMA_TYPE_CHECKS = {
+    "int64": pa.types.is_int64,
+    "float64": pa.types.is_float64,
+    "object": lambda t: (
+        pa.types.is_string(t)
+        or pa.types.is_large_string(t)
+        or (pa.types.is_dictionary(t) and pa.types.is_string(t.value_type))
+    ),
+}
+
+
+def profile_columns(data_file, columns: dict, chunk_size: int, sketch_size: int) -> dict:
+    """Build one sketch per column in a single pass over the projected columns.
+
+    Runs in a worker process: every chunk is summarised into fresh sketches that are
+    merged into the running ones, so memory stays bounded by the sketch size.
+    """
+    sketches = {
+        col: CategoricalSketch() if dtype == "object" else NumericSketch(sketch_size)
+        for col, dtype in columns.items()
+    }
+    parquet_file = pq.ParquetFile(data_file)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(columns)):
+        for col, sketch in sketches.items():
+            values = batch.column(col)
+            if isinstance(sketch, NumericSketch):
+                sketch.update(values.to_numpy(zero_copy_only=False))
+            else:
+                sketch.update(values.to_pandas())
+    return sketches
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> float:
+    """PSI between two binned distributions given as proportions"""
+    expected = np.clip(expected, eps, None)
+    actual = np.clip(actual, eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov-Smirnov statistic evaluated at the bin edges"""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual)))) if len(expected) else 0.0
+
 
 class DataValidation:
     def __init__(self, config: DataValidationConfig):
@@ -9,26 +65,283 @@ class DataValidation:
 
 
     def validate_all_columns(self) -> bool:
+        """
+        Validates the ingested data against schema.yaml.
+        Column names, order and dtypes are checked from the Parquet footer, then the data is
+        scanned in chunk_size chunks for nulls and value ranges with vectorized pandas operations.
+        With names_only only the header is read. The scan stops at the first fatal violation
+        when fail_fast is set. One JSON report and one status line are written at the end.
+        Function returns the validation status
+        """
         try:
-            validation_status = None 
+            violations = []
+            report = {
+                "data_file": str(self.config.unzip_data_dir),
+                "names_only": self.config.names_only,
+                "rows_checked": 0,
+            }
+
+            parquet_file = pq.ParquetFile(self.config.unzip_data_dir)
+            arrow_schema = parquet_file.schema_arrow
+            all_cols = arrow_schema.names
+            all_schema = dict(self.config.all_schema)
+            expected_cols = list(all_schema.keys())
 
-            data = pd.read_csv(self.config.unzip_data_dir)
-            all_cols = list(data.columns)
+            # Column names and order
+            missing = [col for col in expected_cols if col not in all_cols]
+            unexpected = [col for col in all_cols if col not in all_schema]
+            if missing:
+                violations.append({"check": "missing_columns", "columns": missing})
+            if unexpected:
+                violations.append({"check": "unexpected_columns", "columns": unexpected})
+            if not missing and not unexpected and all_cols != expected_cols:
+                violations.append({"check": "column_order", "expected": expected_cols, "actual": all_cols})
 
-            all_schema = self.config.all_schema.keys()
+            if not self.config.names_only and not (violations and self.config.fail_fast):
+                self._check_dtypes(parquet_file, all_schema, violations)
 
-            for col in all_cols:
-                if col not in all_schema:
-                    validation_status = False 
+            if not self.config.names_only and not (violations and self.config.fail_fast):
+                report.update(self._scan_values(parquet_file, [col for col in expected_cols if col in all_cols], violations))
 
-                    with open(self.config.STATUS_FILE, 'w') as f:
-                        f.write(f"Validation status: {validation_status}")
+            validation_status = not violations
+            report["status"] = validation_status
+            report["violations"] = violations
 
-                else:
-                    validation_status = True 
-                    with open(self.config.STATUS_FILE, 'w') as f:
-                        f.write(f"Validation status: {validation_status}")
+            with open(self.config.report_file, "w") as f:
+                json.dump(report, f, indent=4, default=str)
+
+            with open(self.config.STATUS_FILE, 'w') as f:
+                f.write(f"Validation status: {validation_status}")
+
+            if violations:
+                logging.warning(f"Data validation failed with {len(violations)} violation(s): {violations}")
+            logging.info(f"Validation report saved at: {self.config.report_file}")
 
             return validation_status
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+
+    def _check_dtypes(self, parquet_file: pq.ParquetFile, all_schema: dict, violations: list):
+        """
+        Compare the stored column types with the dtypes declared in schema.yaml, and report the CSV
+        cells the ingestion could not parse as their column's dtype (stored as null, counted in the footer)
+        """
+        arrow_schema = parquet_file.schema_arrow
+        file_metadata = parquet_file.metadata.metadata or {}
+        dtype_errors = json.loads(file_metadata.get(DTYPE_ERRORS_KEY.encode(), b"{}"))
+        for col, dtype in all_schema.items():
+            if col not in arrow_schema.names:
+                continue
+            arrow_type = arrow_schema.field(col).type
+            type_check = SCHEMA_TYPE_CHECKS.get(str(dtype))
+            if type_check is None or not type_check(arrow_type):
+                violations.append({"check": "dtype", "column": col, "expected": str(dtype), "actual": str(arrow_type)})
+            elif col in dtype_errors:
+                violations.append({
+                    "check": "dtype", "column": col, "expected": str(dtype),
+                    "invalid_values": dtype_errors[col]["count"], "examples": dtype_errors[col]["examples"]
+                })
+            else:
+                continue
+            if self.config.fail_fast:
+                return
+
+
+    def _scan_values(self, parquet_file: pq.ParquetFile, columns: list, violations: list) -> dict:
+        """Stream the data in chunks counting nulls and out of range values per column"""
+        constraints = {col: dict(rule) for col, rule in self.config.constraints.items() if col in columns}
+        not_nullable = [col for col, rule in constraints.items() if not rule.get("nullable", True)]
+        min_bounds = pd.Series({col: rule["min"] for col, rule in constraints.items() if rule.get("min") is not None}, dtype="float64")
+        max_bounds = pd.Series({col: rule["max"] for col, rule in constraints.items() if rule.get("max") is not None}, dtype="float64")
+
+        rows = 0
+        null_counts = pd.Series(0, index=columns, dtype="int64")
+        below_counts = pd.Series(0, index=min_bounds.index, dtype="int64")
+        above_counts = pd.Series(0, index=max_bounds.index, dtype="int64")
+        numeric_cols = [col for col in columns if col in min_bounds.index or col in max_bounds.index]
+        col_min = col_max = None
+
+        for batch in parquet_file.iter_batches(batch_size=self.config.chunk_size, columns=columns):
+            chunk = batch.to_pandas()
+            rows += len(chunk)
+
+            # One vectorized pass per chunk for every column
+            null_counts += chunk.isna().sum()
+            if len(min_bounds):
+                below_counts += chunk[min_bounds.index].lt(min_bounds).sum()
+            if len(max_bounds):
+                above_counts += chunk[max_bounds.index].gt(max_bounds).sum()
+            if numeric_cols:
+                chunk_min, chunk_max = chunk[numeric_cols].min(), chunk[numeric_cols].max()
+                col_min = chunk_min if col_min is None else np.fmin(col_min, chunk_min)
+                col_max = chunk_max if col_max is None else np.fmax(col_max, chunk_max)
+
+            fatal = (
+                null_counts[not_nullable].gt(0).any()
+                or below_counts.gt(0).any()
+                or above_counts.gt(0).any()
+            )
+            if fatal and self.config.fail_fast:
+                logging.info(f"Stopping validation scan after {rows} rows at the first fatal violation")
+                break
+
+        for col in not_nullable:
+            if null_counts[col]:
+                violations.append({"check": "nulls", "column": col, "count": int(null_counts[col])})
+        for col, count in below_counts.items():
+            if count:
+                violations.append({"check": "min", "column": col, "min": float(min_bounds[col]), "count": int(count)})
+        for col, count in above_counts.items():
+            if count:
+                violations.append({"check": "max", "column": col, "max": float(max_bounds[col]), "count": int(count)})
+
+        return {
+            "rows_checked": rows,
+            "null_counts": {col: int(count) for col, count in null_counts.items()},
+            "value_ranges": {
+                col: {"min": float(col_min[col]), "max": float(col_max[col])}
+                for col in numeric_cols
+            } if col_min is not None else {},
+        }
+
+
+    def profile_data(self) -> dict:
+        """
+        Computes per-column statistics in one pass over the data.
+        Numeric columns get count, nulls, min, max, mean, std and quantiles from a mergeable
+        sketch, object columns (City, Company) get nulls, cardinality and top-k values.
+        Columns are spread across a pool of profile_workers processes.
+        Function returns the profile and saves it to profile_file
+        """
+        start = time.perf_counter()
+        available = set(pq.read_schema(self.config.unzip_data_dir).names)
+        columns = {col: str(dtype) for col, dtype in dict(self.config.all_schema).items() if col in available}
+
+        # Round robin the columns over the workers, each worker reads only its own columns
+        n_workers = max(1, min(self.config.profile_workers, len(columns)))
+        groups = [dict(list(columns.items())[i::n_workers]) for i in range(n_workers)]
+        args = (self.config.unzip_data_dir, self.config.chunk_size, self.config.sketch_size)
+
+        sketches = {}
+        if n_workers == 1:
+            sketches.update(profile_columns(args[0], groups[0], *args[1:]))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=process_pool_context()) as executor:
+                futures = [executor.submit(profile_columns, args[0], group, *args[1:]) for group in groups]
+                for future in futures:
+                    sketches.update(future.result())
+
+        profile = {
+            "data_file": str(self.config.unzip_data_dir),
+            "columns": {
+                col: sketches[col].to_dict(self.config.top_k) if isinstance(sketches[col], CategoricalSketch) else sketches[col].to_dict()
+                for col in columns
+            },
+        }
+        save_json(path=Path(self.config.profile_file), data=profile)
+        logging.info(f"Profiled {len(columns)} columns with {n_workers} worker(s) in {time.perf_counter() - start:.2f}s")
+        return profile
+
+
+    def build_reference_profile(self) -> dict:
+        """
+        Builds the drift reference from the current data: fixed-size histograms per numeric
+        column (edges at the reference quantiles) and category proportions per object column.
+        Function returns the reference and saves it to reference_profile
+        """
+        available = set(pq.read_schema(self.config.unzip_data_dir).names)
+        columns = {col: str(dtype) for col, dtype in dict(self.config.all_schema).items() if col in available}
+        sketches = profile_columns(self.config.unzip_data_dir, columns, self.config.chunk_size, self.config.sketch_size)
+
+        reference = {"data_file": str(self.config.unzip_data_dir), "columns": {}}
+        for col, sketch in sketches.items():
+            if isinstance(sketch, CategoricalSketch):
+                reference["columns"][col] = {
+                    "type": "categorical",
+                    "count": sketch.count,
+                    "proportions": (sketch.counts / max(sketch.count, 1)).to_dict(),
+                }
+            else:
+                quantiles = np.linspace(0, 1, self.config.drift_bins + 1)[1:-1]
+                edges = np.unique(sketch.quantile(quantiles)) if sketch.count else np.empty(0)
+                counts, _ = np.histogram(sketch.values, bins=np.concatenate([[-np.inf], edges, [np.inf]]), weights=sketch.weights)
+                reference["columns"][col] = {
+                    "type": "numeric",
+                    "count": sketch.count,
+                    "edges": edges.tolist(),
+                    "proportions": (counts / max(counts.sum(), 1)).tolist(),
+                }
+
+        save_json(path=Path(self.config.reference_profile), data=reference)
+        return reference
+
+
+    def detect_drift(self) -> bool:
+        """
+        Compares the data against the persisted reference profile in one streaming pass.
+        Incoming values are counted into the reference histograms chunk by chunk, so memory is
+        bounded by the number of bins, then PSI and a binned KS statistic are computed per column.
+        When no reference exists yet it is built from the current data.
+        Function returns the drift status (True when no column drifted)
+        """
+        if self.config.refresh_reference or not os.path.exists(self.config.reference_profile):
+            logging.info(f"Building drift reference profile at: {self.config.reference_profile}")
+            self.build_reference_profile()
+
+        with open(self.config.reference_profile) as f:
+            reference = json.load(f)["columns"]
+
+        available = set(pq.read_schema(self.config.unzip_data_dir).names)
+        columns = [col for col in reference if col in available]
+        bins = {
+            col: np.concatenate([[-np.inf], ref["edges"], [np.inf]])
+            for col, ref in reference.items() if ref["type"] == "numeric" and col in available
+        }
+        counts = {col: np.zeros(len(edges) - 1) for col, edges in bins.items()}
+        categories = {col: CategoricalSketch() for col in columns if col not in bins}
+
+        parquet_file = pq.ParquetFile(self.config.unzip_data_dir)
+        for batch in parquet_file.iter_batches(batch_size=self.config.chunk_size, columns=columns):
+            for col, edges in bins.items():
+                values = batch.column(col).to_numpy(zero_copy_only=False).astype("float64")
+                counts[col] += np.histogram(values[~np.isnan(values)], bins=edges)[0]
+            for col, sketch in categories.items():
+                sketch.update(batch.column(col).to_pandas())
+
+        report = {"reference_profile": str(self.config.reference_profile), "columns": {}}
+        for col in columns:
+            ref = reference[col]
+            if col in bins:
+                expected = np.asarray(ref["proportions"])
+                actual = counts[col] / max(counts[col].sum(), 1)
+                new_categories = []
+            else:
+                sketch = categories[col]
+                labels = sorted(set(ref["proportions"]) | set(sketch.counts.index))
+                expected = np.array([ref["proportions"].get(label, 0.0) for label in labels])
+                actual = sketch.counts.reindex(labels, fill_value=0).to_numpy() / max(sketch.count, 1)
+                new_categories = [label for label in labels if label not in ref["proportions"]]
+
+            # KS needs ordered bins, categorical columns are judged on PSI alone
+            psi = population_stability_index(expected, actual)
+            ks = binned_ks(expected, actual) if col in bins else None
+            report["columns"][col] = {
+                "psi": psi,
+                "ks": ks,
+                "drifted": psi > self.config.psi_threshold or (ks is not None and ks > self.config.ks_threshold),
+                "new_categories": new_categories,
+            }
+
+        drifted = [col for col, result in report["columns"].items() if result["drifted"]]
+        drift_status = not drifted
+        report["drifted_columns"] = drifted
+        report["status"] = drift_status
+        save_json(path=Path(self.config.drift_report_file), data=report)
+
+        with open(self.config.drift_status_file, "w") as f:
+            f.write(f"Drift status: {drift_status}")
+
+        if drifted:
+            logging.warning(f"Data drift detected in columns: {drifted}")
+        return drift_status
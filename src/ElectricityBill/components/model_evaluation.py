@@ -0,0 +1,264 @@
+import os
+import time
+import json
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import xgboost as xgb
+import pyarrow.parquet as pq
+from pathlib import Path
+from src.ElectricityBill import logging
+from src.ElectricityBill.utils.commons import load_matrix, save_json
+from src.ElectricityBill.utils.profiling import step
+from src.ElectricityBill.components.model_trainer import row_slice
+from src.ElectricityBill.entity.config_entity import ModelEvaluationConfig
+
+
+def grouped_metrics(y_true, y_pred, groups, n_groups: int) -> dict:
+    """RMSE/MAE/R²/MAPE per group code in one bincount pass each.
+
+    MAPE is in percent and skips rows where the true bill is 0.
+    """
+    err = y_true - y_pred
+    abs_err = np.abs(err)
+    nonzero = y_true != 0
+    ape = np.divide(abs_err, np.abs(y_true), out=np.zeros_like(abs_err), where=nonzero)
+    # Center y before the sum of squares so the SST stays accurate for large bills
+    y_centered = y_true - y_true.mean()
+
+    count = np.bincount(groups, minlength=n_groups).astype("float64")
+    sse = np.bincount(groups, weights=err ** 2, minlength=n_groups)
+    sae = np.bincount(groups, weights=abs_err, minlength=n_groups)
+    sum_y = np.bincount(groups, weights=y_centered, minlength=n_groups)
+    sum_y2 = np.bincount(groups, weights=y_centered ** 2, minlength=n_groups)
+    sum_ape = np.bincount(groups, weights=ape, minlength=n_groups)
+    n_nonzero = np.bincount(groups, weights=nonzero, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sst = sum_y2 - sum_y ** 2 / count
+        return {
+            "count": count.astype("int64"),
+            "rmse": np.sqrt(sse / count),
+            "mae": sae / count,
+            "r2": np.where(sst > 0, 1 - sse / sst, np.nan),
+            "mape": 100 * sum_ape / n_nonzero,
+        }
+
+
+def regression_metrics(y_true, y_pred) -> dict:
+    metrics = grouped_metrics(y_true, y_pred, np.zeros(len(y_true), dtype="int64"), 1)
+    return {name: _to_json(values[0]) for name, values in metrics.items()}
+
+
+def bootstrap_metrics(y_true, y_pred, n_bootstrap: int, confidence_level: float, block_elements: int, seed: int) -> dict:
+    """
+    Percentile bootstrap confidence intervals of RMSE/MAE/R²/MAPE.
+    Replicates are drawn as (block, n_rows) index matrices, with the block size chosen so that
+    block * n_rows stays below block_elements. Each block is turned into per-replicate row counts
+    with a single bincount, and one matrix product of the counts with the per-row error terms
+    gives every sum the metrics need, instead of one random gather per metric
+    """
+    n = len(y_true)
+    err = y_true - y_pred
+    abs_err = np.abs(err)
+    nonzero = y_true != 0
+    y_centered = y_true - y_true.mean()
+    # Columns: squared error, absolute error, y, y², absolute percentage error, nonzero y
+    terms = np.column_stack([
+        err ** 2,
+        abs_err,
+        y_centered,
+        y_centered ** 2,
+        np.divide(abs_err, np.abs(y_true), out=np.zeros_like(abs_err), where=nonzero),
+        nonzero.astype("float64"),
+    ])
+
+    rng = np.random.default_rng(seed)
+    index_dtype = "int32" if n < np.iinfo("int32").max else "int64"
+    block = int(max(1, min(n_bootstrap, block_elements // max(n, 1))))
+    sums = np.empty((n_bootstrap, terms.shape[1]))
+    for start in range(0, n_bootstrap, block):
+        stop = min(start + block, n_bootstrap)
+        idx = rng.integers(0, n, size=(stop - start, n), dtype=index_dtype)
+        # Offset every replicate's indices so one bincount gives all the count rows of the block
+        offsets = (np.arange(stop - start, dtype="int64") * n)[:, None]
+        counts = np.bincount((idx + offsets).ravel(), minlength=(stop - start) * n).reshape(stop - start, n)
+        sums[start:stop] = counts.astype("float64") @ terms
+
+    sse, sae, sum_y, sum_y2, sum_ape, n_nonzero = sums.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        replicates = {
+            "rmse": np.sqrt(sse / n),
+            "mae": sae / n,
+            "r2": 1 - sse / (sum_y2 - sum_y ** 2 / n),
+            "mape": 100 * sum_ape / n_nonzero,
+        }
+
+    alpha = (1 - confidence_level) / 2
+    return {
+        name: {
+            "lower": _to_json(np.nanquantile(values, alpha)),
+            "upper": _to_json(np.nanquantile(values, 1 - alpha)),
+            "std": _to_json(np.nanstd(values)),
+        }
+        for name, values in replicates.items()
+    }
+
+
+def _to_json(value):
+    value = value.item() if hasattr(value, "item") else value
+    return None if isinstance(value, float) and not np.isfinite(value) else value
+
+
+class ModelEvaluation:
+    def __init__(self, config: ModelEvaluationConfig):
+        self.config = config
+
+
+    def load_model(self):
+        """XGBoost booster for .json models, otherwise a joblib model (the sgd baseline)"""
+        if str(self.config.model_path).endswith(".json"):
+            booster = xgb.Booster()
+            booster.load_model(self.config.model_path)
+            return booster
+        return joblib.load(self.config.model_path)
+
+
+    def predict(self, model, X):
+        """Predicts batch_size rows at a time straight from the memory-mapped matrix"""
+        n_rows = X.shape[0]
+        predictions = np.empty(n_rows, dtype="float64")
+        iteration_range = None
+        if isinstance(model, xgb.Booster):
+            try:
+                # Ignore the trees grown after the early stopping optimum
+                iteration_range = (0, model.best_iteration + 1)
+            except AttributeError:
+                iteration_range = (0, 0)
+        for start in range(0, n_rows, self.config.batch_size):
+            stop = min(start + self.config.batch_size, n_rows)
+            batch = row_slice(X, start, stop)
+            if isinstance(model, xgb.Booster):
+                predictions[start:stop] = model.inplace_predict(batch, iteration_range=iteration_range)
+            else:
+                predictions[start:stop] = model.predict(batch)
+        return predictions
+
+
+    def load_test_data(self):
+        """
+        The stage 03 test matrix, or after an incremental training run the holdout of the last full
+        rebuild transformed batch by batch with the preprocessor bound to the model, whose imputer
+        statistics have moved on from the ones the stage 03 matrix was transformed with.
+        Function returns X_test, y_test and the feature names
+        """
+        state = {}
+        if self.config.training_state_file and os.path.exists(self.config.training_state_file):
+            with open(self.config.training_state_file) as f:
+                state = json.load(f)
+
+        if state.get("last_mode") != "incremental":
+            X_test = load_matrix(self.config.test_data_dir)
+            y_test = np.asarray(np.load(self.config.test_target_path, mmap_mode="r"), dtype="float64")
+            with open(self.config.feature_names_path) as f:
+                feature_names = json.load(f)["feature_names"]
+            return X_test, y_test, feature_names
+
+        preprocessor = joblib.load(self.config.preprocessor_path)
+        blocks, targets = [], []
+        for batch in pq.ParquetFile(self.config.holdout_path).iter_batches(batch_size=self.config.batch_size):
+            frame = batch.to_pandas()
+            targets.append(frame.pop(self.config.target_column).to_numpy(dtype="float64"))
+            blocks.append(preprocessor.transform(frame))
+        X_test = sp.vstack(blocks).tocsr() if sp.issparse(blocks[0]) else np.vstack(blocks)
+        logging.info(f"Evaluating the incrementally trained model on the {X_test.shape[0]} holdout rows of the last full rebuild")
+        return X_test, np.concatenate(targets), preprocessor.get_feature_names_out().tolist()
+
+
+    def decode_slice(self, X, feature_names: list, column: str):
+        """
+        Recovers a categorical column from its one-hot features.
+        Function returns the per-row value codes and the values, with "unknown" for rows
+        whose category was not seen when the preprocessor was fitted
+        """
+        prefix = f"categorical__{column}_"
+        positions = [i for i, name in enumerate(feature_names) if name.startswith(prefix)]
+        if not positions:
+            return None, None
+        values = [feature_names[i][len(prefix):] for i in positions] + ["unknown"]
+        one_hot = X[:, positions]
+        if sp.issparse(one_hot):
+            one_hot = one_hot.tocsr()
+            codes = np.asarray(one_hot.argmax(axis=1)).ravel()
+            present = np.asarray(one_hot.max(axis=1).todense()).ravel() > 0
+        else:
+            one_hot = np.asarray(one_hot)
+            codes = one_hot.argmax(axis=1)
+            present = one_hot.max(axis=1) > 0
+        codes[~present] = len(positions)
+        return codes, values
+
+
+    def evaluate(self):
+        """
+        Evaluates the trained model on the transformed test set (see load_test_data): batched predictions, overall
+        RMSE/MAE/R²/MAPE with bootstrap confidence intervals and the same metrics per value of every
+        slice column. Everything is written to metrics_file.
+        Function returns the metrics dict
+        """
+        try:
+            X_test, y_test, feature_names = self.load_test_data()
+
+            model = self.load_model()
+            start = time.perf_counter()
+            with step("predict", rows=len(y_test)):
+                y_pred = self.predict(model, X_test)
+            prediction_time = time.perf_counter() - start
+            logging.info(f"Predicted {len(y_pred)} rows in {prediction_time:.2f}s")
+
+            start = time.perf_counter()
+            with step("bootstrap", rows=len(y_test)):
+                intervals = bootstrap_metrics(
+                    y_test, y_pred,
+                    n_bootstrap=self.config.n_bootstrap,
+                    confidence_level=self.config.confidence_level,
+                    block_elements=self.config.bootstrap_block_elements,
+                    seed=self.config.random_state
+                )
+            bootstrap_time = time.perf_counter() - start
+            logging.info(f"Computed {self.config.n_bootstrap} bootstrap replicates in {bootstrap_time:.2f}s")
+
+            slices = {}
+            for column in self.config.slice_columns or []:
+                codes, values = self.decode_slice(X_test, feature_names, column)
+                if codes is None:
+                    logging.warning(f"No one-hot features for slice column {column}, skipping it")
+                    continue
+                per_value = grouped_metrics(y_test, y_pred, codes, len(values))
+                slices[column] = {
+                    value: {name: _to_json(metric[i]) for name, metric in per_value.items()}
+                    for i, value in enumerate(values)
+                    if per_value["count"][i] > 0
+                }
+
+            metrics = {
+                "model_path": str(self.config.model_path),
+                "n_rows": len(y_test),
+                "metrics": regression_metrics(y_test, y_pred),
+                "confidence_intervals": {
+                    "confidence_level": self.config.confidence_level,
+                    "n_bootstrap": self.config.n_bootstrap,
+                    **intervals,
+                },
+                "slices": slices,
+                "prediction_seconds": round(prediction_time, 4),
+                "rows_per_second": round(len(y_test) / prediction_time, 1) if prediction_time > 0 else None,
+                "bootstrap_seconds": round(bootstrap_time, 4),
+            }
+            save_json(path=Path(self.config.metrics_file), data=metrics)
+            logging.info(f"Test metrics: {metrics['metrics']}")
+            return metrics
+
+        except Exception as e:
+            logging.error(f"Error in evaluate: {e}")
+            raise e
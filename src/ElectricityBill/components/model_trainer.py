@@ -0,0 +1,718 @@
+import os
+import time
+import json
+import hashlib
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import xgboost as xgb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from sklearn.linear_model import SGDRegressor
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.ElectricityBill import logging, setup_logging
+from src.ElectricityBill.utils.commons import load_matrix, save_json, save_object, get_peak_rss_mb, process_pool_context, atomic_path, atomic_write
+from src.ElectricityBill.utils.sketches import NumericSketch, CategoricalSketch
+from src.ElectricityBill.utils.compiled_preprocessor import CompiledPreprocessor, compile_preprocessor
+from src.ElectricityBill.entity.config_entity import ModelTrainerConfig
+
+
+# Keys of the XGBRegressor section that are not booster parameters
+TRAINING_KEYS = ("n_estimators", "n_jobs", "random_state", "early_stopping_rounds", "validation_fraction", "log_every")
+
+
+def row_slice(X, start: int, stop: int):
+    """Rows start:stop of a CSR or dense matrix without copying the memory-mapped arrays"""
+    if sp.issparse(X):
+        lo, hi = X.indptr[start], X.indptr[stop]
+        return sp.csr_matrix(
+            (X.data[lo:hi], X.indices[lo:hi], np.asarray(X.indptr[start:stop + 1]) - lo),
+            shape=(stop - start, X.shape[1]),
+            copy=False
+        )
+    return X[start:stop]
+
+
+def booster_params(params: dict) -> dict:
+    """Translate the XGBRegressor section of params.yaml into xgb.train parameters"""
+    booster = {key: value for key, value in params.items() if key not in TRAINING_KEYS}
+    booster.setdefault("objective", "reg:squarederror")
+    booster.setdefault("tree_method", "hist")
+    booster["nthread"] = params.get("n_jobs", -1)
+    booster["seed"] = params.get("random_state", 0)
+    # xgb.train names the sklearn-style keys differently
+    if "learning_rate" in booster:
+        booster["eta"] = booster.pop("learning_rate")
+    if "reg_lambda" in booster:
+        booster["lambda"] = booster.pop("reg_lambda")
+    if "reg_alpha" in booster:
+        booster["alpha"] = booster.pop("reg_alpha")
+    return booster
+
+
+class MaskedRowIter(xgb.DataIter):
+    """Feeds the rows of X/y where mask is True to a QuantileDMatrix, chunk_rows at a time,
+    so the memory-mapped matrix is never copied whole"""
+
+    def __init__(self, X, y, mask, feature_names=None, chunk_rows: int = 100000):
+        self.X, self.y, self.mask = X, y, mask
+        self.feature_names = feature_names
+        self.chunk_rows = chunk_rows
+        self.start = 0
+        super().__init__()
+
+    def next(self, input_data) -> bool:
+        n_rows = self.X.shape[0]
+        while self.start < n_rows:
+            start, stop = self.start, min(self.start + self.chunk_rows, n_rows)
+            self.start = stop
+            keep = self.mask[start:stop]
+            if keep.any():
+                input_data(
+                    data=row_slice(self.X, start, stop)[keep],
+                    label=np.asarray(self.y[start:stop])[keep],
+                    feature_names=self.feature_names
+                )
+                return True
+        return False
+
+    def reset(self):
+        self.start = 0
+
+
+def build_dmatrices(X, y, params: dict, feature_names=None):
+    """
+    QuantileDMatrix for the fit rows and, when validation_fraction > 0, for a held-out set of
+    validation rows drawn at random (seeded by random_state). The streaming split keeps the rows
+    in file order, so a tail fold would only hold the newest rows
+    """
+    n_rows = X.shape[0]
+    n_valid = int(n_rows * params.get("validation_fraction", 0.1))
+    n_fit = n_rows - n_valid
+    is_valid = np.zeros(n_rows, dtype=bool)
+    is_valid[np.random.default_rng(params.get("random_state", 0)).choice(n_rows, size=n_valid, replace=False)] = True
+    dtrain = xgb.QuantileDMatrix(
+        MaskedRowIter(X, y, ~is_valid, feature_names),
+        max_bin=params.get("max_bin", 256),
+        nthread=params.get("n_jobs", -1)
+    )
+    evals = [(dtrain, "train")]
+    if n_valid:
+        dvalid = xgb.QuantileDMatrix(
+            MaskedRowIter(X, y, is_valid, feature_names),
+            ref=dtrain,
+            nthread=params.get("n_jobs", -1)
+        )
+        evals.append((dvalid, "valid"))
+    return dtrain, evals, n_fit, n_valid
+
+
+def sample_candidates(space: dict, n_candidates: int, seed: int) -> list:
+    """Draw n_candidates parameter sets from the search space.
+
+    A space entry is either a list of choices or {type: int|float, low, high, log}.
+    The same seed always yields the same candidates, which is what lets a search resume.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for _ in range(n_candidates):
+        candidate = {}
+        for name, spec in sorted(space.items()):
+            if isinstance(spec, (list, tuple)):
+                candidate[name] = spec[int(rng.integers(len(spec)))]
+                continue
+            low, high = float(spec["low"]), float(spec["high"])
+            if spec.get("log", False):
+                value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                value = float(rng.uniform(low, high))
+            if spec.get("type", "float") == "int":
+                value = int(round(value))
+            candidate[name] = value
+        candidates.append(candidate)
+    return candidates
+
+
+def halving_schedule(n_candidates: int, factor: int, min_resource: int, max_resource: int) -> list:
+    """(n_candidates, boosting rounds) of every successive halving rung"""
+    schedule = []
+    n, resource = n_candidates, min_resource
+    while True:
+        resource = min(resource, max_resource)
+        schedule.append((n, resource))
+        if n <= 1 or resource >= max_resource:
+            return schedule
+        n, resource = max(1, n // factor), resource * factor
+
+
+class TimeBudget(xgb.callback.TrainingCallback):
+    """Stops boosting once a trial has used its wall time budget"""
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.deadline = time.perf_counter() + seconds if seconds else None
+        self.exhausted = False
+
+    def after_iteration(self, model, epoch, evals_log):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = True
+            return True
+        return False
+
+
+# Per-process training data of the search workers, loaded once by _init_search_worker
+_WORKER_DATA = {}
+
+
+def _init_search_worker(train_data_dir, train_target_path):
+    # Workers log to the console only, the parent process owns the rotated log file
+    setup_logging(to_file=False)
+    # Memory-map instead of receiving the matrix pickled, so all workers share the page cache
+    _WORKER_DATA["X"] = load_matrix(train_data_dir)
+    _WORKER_DATA["y"] = np.load(train_target_path, mmap_mode="r")
+    _WORKER_DATA["dmatrices"] = {}
+
+
+def _run_trial(trial_id: str, params: dict, num_boost_round: int, timeout: float) -> dict:
+    """Train one candidate in a search worker and report its best validation score"""
+    start = time.perf_counter()
+    # The quantised matrices only depend on max_bin, so consecutive trials in a worker reuse them
+    max_bin = params.get("max_bin", 256)
+    if max_bin not in _WORKER_DATA["dmatrices"]:
+        _WORKER_DATA["dmatrices"][max_bin] = build_dmatrices(_WORKER_DATA["X"], _WORKER_DATA["y"], params)
+    dtrain, evals, _, n_valid = _WORKER_DATA["dmatrices"][max_bin]
+
+    budget = TimeBudget(timeout)
+    evals_result = {}
+    booster = xgb.train(
+        booster_params(params),
+        dtrain,
+        num_boost_round=num_boost_round,
+        evals=evals,
+        evals_result=evals_result,
+        early_stopping_rounds=params.get("early_stopping_rounds") if n_valid else None,
+        callbacks=[budget],
+        verbose_eval=False
+    )
+    history = evals_result["valid" if n_valid else "train"]
+    scores = next(iter(history.values()))
+    best_iteration = getattr(booster, "best_iteration", len(scores) - 1)
+    return {
+        "trial_id": trial_id,
+        "score": float(scores[best_iteration]),
+        "best_iteration": int(best_iteration),
+        "iterations": len(scores),
+        "timed_out": budget.exhausted,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+class IterationTimer(xgb.callback.TrainingCallback):
+    """Records the wall time of every boosting iteration and logs every log_every-th one"""
+
+    def __init__(self, log_every: int = 10):
+        super().__init__()
+        self.log_every = max(1, int(log_every))
+        self.timings = []
+        self._start = None
+
+    def before_iteration(self, model, epoch, evals_log):
+        self._start = time.perf_counter()
+        return False
+
+    def after_iteration(self, model, epoch, evals_log):
+        elapsed = time.perf_counter() - self._start
+        self.timings.append(elapsed)
+        if epoch % self.log_every == 0:
+            scores = ", ".join(
+                f"{data}-{metric}: {values[-1]:.4f}"
+                for data, metrics in evals_log.items()
+                for metric, values in metrics.items()
+            )
+            logging.info(f"Iteration {epoch}: {elapsed * 1000:.1f} ms, {scores}")
+        return False
+
+
+class ModelTrainer:
+    def __init__(self, config: ModelTrainerConfig):
+        self.config = config
+        # The preprocessor the current model was trained with, kept next to the model
+        self.preprocessor_path = os.path.join(self.config.root_dir, "preprocessor_obj.joblib")
+        # Its NumPy-only form used by the prediction service
+        self.compiled_preprocessor_path = os.path.join(self.config.root_dir, "preprocessor_compiled.json")
+
+
+    @property
+    def model_path(self) -> str:
+        name = self.config.model_name if self.config.model_type == "xgboost" else self.config.linear_model_name
+        return os.path.join(self.config.root_dir, name)
+
+
+    def load_state(self) -> dict:
+        """Watermark and run counters of the previous training run"""
+        if not os.path.exists(self.config.state_file):
+            return {}
+        with open(self.config.state_file) as f:
+            return json.load(f)
+
+
+    def needs_full_rebuild(self) -> bool:
+        """True unless incremental mode is on and a previous model of the same type can be continued"""
+        if self.config.mode != "incremental":
+            return True
+        state = self.load_state()
+        if state.get("model_type") != self.config.model_type:
+            logging.info(f"No previous {self.config.model_type} training state, running a full rebuild")
+            return True
+        required = [self.model_path, self.preprocessor_path, self.config.preprocessor_state_file]
+        if not self.config.watermark_column:
+            required.append(self.config.seen_rows_file)
+        if not all(os.path.exists(path) for path in required):
+            logging.info("Previous model artifacts are missing, running a full rebuild")
+            return True
+        if state["runs_since_full"] >= self.config.full_rebuild_every:
+            logging.info(f"{state['runs_since_full']} incremental runs since the last full rebuild, running a full rebuild")
+            return True
+        return False
+
+
+    @staticmethod
+    def row_hashes(frame) -> np.ndarray:
+        """64-bit hash of every row's values, identifies the rows a model was trained on"""
+        return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+    def save_seen_rows(self, hashes) -> None:
+        with atomic_write(self.config.seen_rows_file) as f:
+            np.save(f, np.unique(np.asarray(hashes, dtype="uint64")))
+
+
+    def new_rows(self, state: dict):
+        """
+        Rows the model was not trained on: newer than the stored watermark when watermark_column is
+        set, otherwise rows whose hash is not in seen_rows_file (a row identical to one already seen
+        counts as seen). Function returns the rows as a DataFrame and their hashes (None with a watermark)
+        """
+        watermark_column = self.config.watermark_column
+        if watermark_column:
+            table = pq.read_table(self.config.data_path, filters=[(watermark_column, ">", state["watermark"])])
+            return table.to_pandas(), None
+        seen = np.load(self.config.seen_rows_file)
+        frames, hashes = [], []
+        for batch in pq.ParquetFile(self.config.data_path).iter_batches(batch_size=self.config.chunk_size):
+            frame = batch.to_pandas()
+            batch_hashes = self.row_hashes(frame)
+            is_new = ~np.isin(batch_hashes, seen)
+            if is_new.any():
+                frames.append(frame[is_new])
+                hashes.append(batch_hashes[is_new])
+        if not frames:
+            return pd.DataFrame(), np.empty(0, dtype="uint64")
+        return pd.concat(frames, ignore_index=True), np.concatenate(hashes)
+
+
+    def _update_sketches(self, sketches: dict, frame):
+        for col, sketch in sketches["numerical"].items():
+            sketch.update(np.asarray(frame[col], dtype="float64"))
+        for col, sketch in sketches["categorical"].items():
+            sketch.update(frame[col])
+
+
+    def save_preprocessor(self, preprocessor, verify_rows: int = 10000):
+        """
+        Saves the preprocessor bound to the model together with its compiled NumPy form.
+        The compiled form is checked against transform() on the first verify_rows rows of the
+        data plus an all-missing row and a row with unseen categories before it is written
+        """
+        compiled = CompiledPreprocessor(compile_preprocessor(preprocessor))
+        input_columns = compiled.input_columns
+        sample = next(pq.ParquetFile(self.config.data_path).iter_batches(batch_size=verify_rows, columns=input_columns)).to_pandas()
+        # Same dtypes as the frames PredictionPipeline builds: float64 numbers, object categories
+        dtypes = {col: "object" if col in self.config.categorical_cols else "float64" for col in input_columns}
+        sample = sample.astype(dtypes)
+        edge_cases = pd.DataFrame([
+            {col: None for col in input_columns},
+            {**sample.iloc[0].to_dict(), **{col: "__unseen__" for col in self.config.categorical_cols}},
+        ]).astype(dtypes)
+        sample = pd.concat([sample, edge_cases], ignore_index=True)
+        max_diff = compiled.verify(preprocessor, sample)
+
+        save_object(file_path=self.preprocessor_path, obj=preprocessor)
+        compiled.save(self.compiled_preprocessor_path)
+        logging.info(f"Compiled preprocessor saved at {self.compiled_preprocessor_path}, max difference to transform() {max_diff:.2e}")
+
+
+    def record_full_rebuild(self):
+        """
+        Binds the stage 03 preprocessor to the freshly trained model: copies it (and its compiled form) next to the model,
+        sketches the imputed columns of the training split rows (train_rows_path) so that incremental
+        runs can keep the imputer statistics current, and resets the training state. The test split rows
+        are kept in holdout_file, the fixed holdout the incremental models are evaluated on. Every row of
+        the data, test split included, is marked as seen: its watermark or its hash is stored
+        """
+        try:
+            numerical_cols = self.config.numerical_cols
+            categorical_cols = self.config.categorical_cols
+            watermark_column = self.config.watermark_column
+            sketches = {
+                "numerical": {col: NumericSketch() for col in numerical_cols},
+                "categorical": {col: CategoricalSketch() for col in categorical_cols},
+            }
+            train_rows = np.load(self.config.train_rows_path, mmap_mode="r")
+            watermark, rows, offset, hashes = None, 0, 0, []
+            parquet_file = pq.ParquetFile(self.config.data_path)
+            with atomic_path(self.config.holdout_file) as tmp_path, pq.ParquetWriter(tmp_path, parquet_file.schema_arrow) as holdout:
+                for batch in parquet_file.iter_batches(batch_size=self.config.chunk_size):
+                    frame = batch.to_pandas()
+                    # train_rows is sorted, the positions falling in this batch are one slice of it
+                    lo, hi = np.searchsorted(train_rows, [offset, offset + len(frame)])
+                    positions = np.asarray(train_rows[lo:hi]) - offset
+                    self._update_sketches(sketches, frame.iloc[positions])
+                    is_test = np.ones(len(frame), dtype=bool)
+                    is_test[positions] = False
+                    holdout.write_batch(batch.filter(pa.array(is_test)))
+                    if watermark_column:
+                        batch_max = frame[watermark_column].max()
+                        watermark = batch_max if watermark is None else max(watermark, batch_max)
+                    else:
+                        hashes.append(self.row_hashes(frame))
+                    rows += int(hi - lo)
+                    offset += len(frame)
+            if not watermark_column:
+                self.save_seen_rows(np.concatenate(hashes) if hashes else [])
+
+            self.save_preprocessor(joblib.load(self.config.preprocessor_path))
+            save_object(file_path=self.config.preprocessor_state_file, obj=sketches)
+            state = {
+                "model_type": self.config.model_type,
+                "watermark": watermark.item() if hasattr(watermark, "item") else watermark,
+                "rows_seen": rows,
+                "runs_since_full": 0,
+                "last_mode": "full",
+            }
+            save_json(path=Path(self.config.state_file), data=state)
+            if watermark_column:
+                logging.info(f"Full rebuild recorded at {watermark_column} watermark {state['watermark']}")
+            else:
+                logging.info(f"Full rebuild recorded, {offset} rows marked as seen")
+
+        except Exception as e:
+            logging.error(f"Error in record_full_rebuild: {e}")
+            raise e
+
+
+    def train_incremental(self, params: dict = None):
+        """
+        Continues the previous model with only the rows it was not trained on (see new_rows). The imputer statistics are updated from the persisted sketches, while the scaler and
+        the one-hot vocabulary stay frozen (changing them would silently shift the inputs the existing
+        trees or coefficients were fitted on) until the next full rebuild. XGBoost adds
+        incremental_rounds boosting rounds on top of the saved booster, sgd runs partial_fit.
+        Function returns the updated model, or None when there were no new rows
+        """
+        try:
+            state = self.load_state()
+            watermark_column = self.config.watermark_column
+            new_data, new_hashes = self.new_rows(state)
+            if len(new_data) == 0:
+                logging.info("No new rows since the last training run, the model is up to date")
+                return None
+            logging.info(f"Incremental training on {len(new_data)} new rows")
+
+            sketches = joblib.load(self.config.preprocessor_state_file)
+            self._update_sketches(sketches, new_data)
+            preprocessor = joblib.load(self.preprocessor_path)
+            numerical_imputer = preprocessor.named_transformers_["numerical"].named_steps["imputer"]
+            numerical_imputer.statistics_ = np.array([
+                sketches["numerical"][col].quantile(0.5) for col in self.config.numerical_cols
+            ])
+            categorical_imputer = preprocessor.named_transformers_["categorical"].named_steps["imputer"]
+            categorical_imputer.statistics_ = np.array([
+                sketches["categorical"][col].most_frequent() for col in self.config.categorical_cols
+            ], dtype=object)
+
+            X = preprocessor.transform(new_data.drop(columns=[self.config.target_column]))
+            X = X.tocsr() if sp.issparse(X) else X
+            y = new_data[self.config.target_column].to_numpy(dtype="float64")
+
+            start = time.perf_counter()
+            if self.config.model_type == "xgboost":
+                params = dict(params or self.config.params)
+                dtrain, evals, _, n_valid = build_dmatrices(X, y, params, preprocessor.get_feature_names_out().tolist())
+                timer = IterationTimer(params.get("log_every", 10))
+                model = xgb.train(
+                    booster_params(params),
+                    dtrain,
+                    num_boost_round=self.config.incremental_rounds,
+                    evals=evals,
+                    early_stopping_rounds=params.get("early_stopping_rounds") if n_valid else None,
+                    callbacks=[timer],
+                    verbose_eval=False,
+                    xgb_model=self.model_path
+                )
+                if not n_valid:
+                    # No early stopping ran, the best_iteration loaded with the previous model would make
+                    # evaluation and prediction drop the rounds just added
+                    model.set_attr(best_iteration=str(model.num_boosted_rounds() - 1), best_score=None)
+                with atomic_path(self.model_path) as tmp_path:
+                    model.save_model(tmp_path)
+                details = {"iterations": len(timer.timings), "total_rounds": model.num_boosted_rounds()}
+            else:
+                model = joblib.load(self.model_path)
+                for _ in range(self.config.linear_params.get("epochs", 1)):
+                    model.partial_fit(X, y)
+                save_object(file_path=self.model_path, obj=model)
+                details = {}
+            training_time = time.perf_counter() - start
+
+            self.save_preprocessor(preprocessor)
+            save_object(file_path=self.config.preprocessor_state_file, obj=sketches)
+            if watermark_column:
+                new_watermark = new_data[watermark_column].max()
+                new_watermark = new_watermark.item() if hasattr(new_watermark, "item") else new_watermark
+            else:
+                new_watermark = None
+                self.save_seen_rows(np.concatenate([np.load(self.config.seen_rows_file), new_hashes]))
+            state.update({
+                "watermark": new_watermark,
+                "rows_seen": state.get("rows_seen", 0) + len(new_data),
+                "runs_since_full": state["runs_since_full"] + 1,
+                "last_mode": "incremental",
+            })
+            save_json(path=Path(self.config.state_file), data=state)
+            save_json(path=Path(self.config.metrics_file), data={
+                "mode": "incremental",
+                "model_type": self.config.model_type,
+                "new_rows": len(new_data),
+                "watermark": state["watermark"],
+                "runs_since_full": state["runs_since_full"],
+                "training_seconds": round(training_time, 4),
+                **details,
+                "peak_rss_mb": get_peak_rss_mb(),
+            })
+            logging.info(f"Incremental run {state['runs_since_full']} done in {training_time:.2f}s on {len(new_data)} new rows")
+            return model
+
+        except Exception as e:
+            logging.error(f"Error in train_incremental: {e}")
+            raise e
+
+
+    def train_linear(self):
+        """
+        Full rebuild of the SGDRegressor baseline: epochs passes of partial_fit over chunk_size row
+        slices of the memory-mapped training matrix.
+        Function returns the fitted model
+        """
+        try:
+            params = dict(self.config.linear_params)
+            epochs = params.pop("epochs", 1)
+            model = SGDRegressor(**params)
+            X_train, y_train = self.load_training_data()
+            n_rows = X_train.shape[0]
+
+            start = time.perf_counter()
+            for _ in range(epochs):
+                for row in range(0, n_rows, self.config.chunk_size):
+                    stop = min(row + self.config.chunk_size, n_rows)
+                    model.partial_fit(row_slice(X_train, row, stop), y_train[row:stop])
+            training_time = time.perf_counter() - start
+
+            save_object(file_path=self.model_path, obj=model)
+            save_json(path=Path(self.config.metrics_file), data={
+                "mode": "full",
+                "model_type": "sgd",
+                "n_train_rows": n_rows,
+                "n_features": X_train.shape[1],
+                "epochs": epochs,
+                "training_seconds": round(training_time, 4),
+                "peak_rss_mb": get_peak_rss_mb(),
+            })
+            logging.info(f"Trained SGDRegressor baseline on {n_rows} rows in {training_time:.2f}s")
+            return model
+
+        except Exception as e:
+            logging.error(f"Error in train_linear: {e}")
+            raise e
+
+
+    def load_training_data(self):
+        """Memory-map the transformed training matrix and its target"""
+        X_train = load_matrix(self.config.train_data_dir)
+        y_train = np.load(self.config.train_target_path, mmap_mode="r")
+        return X_train, y_train
+
+
+    def _search_id(self) -> str:
+        # Trials logged under a different search section or data are not reused on resume
+        payload = {
+            "search": {key: value for key, value in self.config.search_params.items() if key not in ("n_workers", "enabled")},
+            "base": self.config.params,
+            "data": [os.stat(path).st_mtime_ns for path in (self.config.train_target_path, self.config.feature_names_path)],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+    def _load_trials(self, search_id: str) -> dict:
+        """Completed trials of this search from the JSONL trial log"""
+        trials = {}
+        if not os.path.exists(self.config.search_log):
+            return trials
+        with open(self.config.search_log) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                if record.get("search_id") == search_id:
+                    trials[record["trial_id"]] = record
+        return trials
+
+
+    def search(self) -> dict:
+        """
+        Successive halving (or plain random) search over the params.yaml search space.
+        Every rung trains the surviving candidates for factor times more boosting rounds in a
+        process pool, each worker memory-maps the training matrix once and runs one single-threaded
+        trial at a time. Trials are appended to the JSONL trial log as they finish, so an interrupted
+        search resumes where it stopped. Function returns the best parameters merged over XGBRegressor
+        """
+        try:
+            search = self.config.search_params
+            search_id = self._search_id()
+            completed = self._load_trials(search_id)
+            if completed:
+                logging.info(f"Resuming search {search_id} with {len(completed)} completed trials")
+
+            candidates = sample_candidates(search["space"], search.get("n_candidates", 27), search.get("random_state", 42))
+            if search.get("method", "halving") == "random":
+                schedule = [(len(candidates), search.get("max_resource", 1000))]
+            else:
+                schedule = halving_schedule(
+                    len(candidates), search.get("factor", 3), search.get("min_resource", 50), search.get("max_resource", 1000)
+                )
+            logging.info(f"Search schedule (candidates, rounds) per rung: {schedule}")
+
+            base = dict(self.config.params)
+            base["n_jobs"] = search.get("n_jobs_per_trial", 1)
+            alive = list(range(len(candidates)))
+            start = time.perf_counter()
+
+            with ProcessPoolExecutor(
+                max_workers=search.get("n_workers", os.cpu_count()),
+                mp_context=process_pool_context(),
+                initializer=_init_search_worker,
+                initargs=(str(self.config.train_data_dir), str(self.config.train_target_path))
+            ) as executor, open(self.config.search_log, "a") as log:
+                for rung, (n_keep, rounds) in enumerate(schedule):
+                    if rung:
+                        # Keep the n_keep best candidates of the previous rung
+                        alive = sorted(alive, key=lambda i: completed[f"r{rung - 1}-c{i}"]["score"])[:n_keep]
+                    futures = {}
+                    for i in alive:
+                        trial_id = f"r{rung}-c{i}"
+                        if trial_id not in completed:
+                            params = {**base, **candidates[i]}
+                            future = executor.submit(_run_trial, trial_id, params, rounds, search.get("trial_timeout"))
+                            futures[future] = (i, params)
+                    for future in as_completed(futures):
+                        i, params = futures[future]
+                        record = {
+                            "search_id": search_id, "rung": rung, "candidate": i,
+                            "num_boost_round": rounds, "params": candidates[i], **future.result()
+                        }
+                        completed[record["trial_id"]] = record
+                        log.write(json.dumps(record) + "\n")
+                        log.flush()
+                        logging.info(f"Trial {record['trial_id']}: score {record['score']:.4f} "
+                                     f"after {record['iterations']} rounds in {record['seconds']:.1f}s")
+
+            last_rung = len(schedule) - 1
+            best = min((completed[f"r{last_rung}-c{i}"] for i in alive), key=lambda record: record["score"])
+            best_params = {**self.config.params, **best["params"]}
+            save_json(path=Path(self.config.best_params_file), data={
+                "search_id": search_id,
+                "trial_id": best["trial_id"],
+                "score": best["score"],
+                "params": best_params,
+                "search_seconds": round(time.perf_counter() - start, 4),
+            })
+            logging.info(f"Best trial {best['trial_id']} with score {best['score']:.4f}: {best['params']}")
+            return best_params
+
+        except Exception as e:
+            logging.error(f"Error in search: {e}")
+            raise e
+
+
+    def train(self, params: dict = None):
+        """
+        Trains an XGBoost regressor with the hist tree method on the transformed training matrix.
+        QuantileDMatrix is built straight from the memory-mapped sparse/dense arrays, a seeded
+        random validation_fraction of the training rows is held out for early stopping,
+        and per-iteration timings, training time and peak RSS are written to the metrics file.
+        params overrides the XGBRegressor section, e.g. with the result of search().
+        Function returns the trained booster
+        """
+        try:
+            params = dict(params or self.config.params)
+            X_train, y_train = self.load_training_data()
+
+            with open(self.config.feature_names_path) as f:
+                feature_names = json.load(f)["feature_names"]
+
+            start = time.perf_counter()
+            dtrain, evals, n_fit, n_valid = build_dmatrices(X_train, y_train, params, feature_names)
+            matrix_time = time.perf_counter() - start
+            logging.info(f"Built QuantileDMatrix for {n_fit} training and {n_valid} validation rows in {matrix_time:.2f}s")
+
+            timer = IterationTimer(params.get("log_every", 10))
+            start = time.perf_counter()
+            booster = xgb.train(
+                booster_params(params),
+                dtrain,
+                num_boost_round=params.get("n_estimators", 100),
+                evals=evals,
+                early_stopping_rounds=params.get("early_stopping_rounds") if n_valid else None,
+                callbacks=[timer],
+                verbose_eval=False
+            )
+            training_time = time.perf_counter() - start
+
+            model_path = self.model_path
+            with atomic_path(model_path) as tmp_path:
+                booster.save_model(tmp_path)
+            logging.info(f"Model saved at: {model_path}")
+
+            timings = np.asarray(timer.timings)
+            metrics = {
+                "mode": "full",
+                "model_type": "xgboost",
+                "n_train_rows": n_fit,
+                "n_valid_rows": n_valid,
+                "n_features": X_train.shape[1],
+                "n_jobs": params.get("n_jobs"),
+                "max_bin": params.get("max_bin"),
+                "iterations": len(timings),
+                "best_iteration": getattr(booster, "best_iteration", len(timings) - 1),
+                "best_score": getattr(booster, "best_score", None),
+                "matrix_build_seconds": round(matrix_time, 4),
+                "training_seconds": round(training_time, 4),
+                "iteration_ms": {
+                    "mean": round(float(timings.mean()) * 1000, 3),
+                    "p50": round(float(np.percentile(timings, 50)) * 1000, 3),
+                    "p99": round(float(np.percentile(timings, 99)) * 1000, 3),
+                    "max": round(float(timings.max()) * 1000, 3),
+                } if len(timings) else {},
+                "peak_rss_mb": get_peak_rss_mb(),
+            }
+            save_json(path=Path(self.config.metrics_file), data=metrics)
+            logging.info(f"Trained {len(timings)} iterations in {training_time:.2f}s, peak RSS {metrics['peak_rss_mb']} MB")
+
+            return booster
+
+        except Exception as e:
+            logging.error(f"Error in train: {e}")
+            raise e
@@ -1,7 +1,12 @@
+import os
 from pathlib import Path 
 from src.ElectricityBill.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH, SCHEMA_FILE_PATH
 from src.ElectricityBill.utils.commons import read_yaml, create_directories
-from src.ElectricityBill.entity.config_entity import (DataIngestionConfig, DataValidationConfig, DataTransformationConfig)
+from src.ElectricityBill.entity.config_entity import (DataIngestionConfig, DataValidationConfig, DataTransformationConfig,
+                                                     ModelTrainerConfig, ModelEvaluationConfig, PredictionConfig,
+                                                     BatchPredictionConfig, StageCacheConfig, ProfilingConfig, LoggingConfig,
+                                                     ArtifactStoreConfig,
+                                                     PipelineConfig, PipelineStageConfig)
 
 class ConfigurationManager:
     def __init__(
@@ -35,6 +40,17 @@ class ConfigurationManager:
             source_URL=config.source_URL,
             local_data_file=config.local_data_file,
             unzip_dir=config.unzip_dir,
+            expected_sha256=config.get("expected_sha256"),
+            expected_size=config.get("expected_size"),
+            chunk_size=config.get("chunk_size", 1024 * 1024),
+            timeout=config.get("timeout", 30),
+            max_retries=config.get("max_retries", 5),
+            backoff_seconds=config.get("backoff_seconds", 2),
+            members=list(config.get("members") or []),
+            extract_manifest=config.get("extract_manifest"),
+            csv_file=config.get("csv_file"),
+            parquet_file=config.get("parquet_file"),
+            all_schema=self.schema.COLUMNS,
         )
 
         return data_ingestion_config
@@ -50,7 +66,25 @@ class ConfigurationManager:
             root_dir=config.root_dir,
             STATUS_FILE=config.STATUS_FILE,
             unzip_data_dir=config.unzip_data_dir,
-            all_schema=schema
+            all_schema=schema,
+            constraints=self.schema.get("CONSTRAINTS", {}),
+            report_file=config.report_file,
+            chunk_size=config.get("chunk_size", 100000),
+            names_only=config.get("names_only", False),
+            fail_fast=config.get("fail_fast", True),
+            profile=config.get("profile", False),
+            profile_file=config.get("profile_file"),
+            profile_workers=config.get("profile_workers", 1),
+            sketch_size=config.get("sketch_size", 256),
+            top_k=config.get("top_k", 10),
+            drift_check=config.get("drift_check", False),
+            reference_profile=config.get("reference_profile"),
+            drift_report_file=config.get("drift_report_file"),
+            drift_status_file=config.get("drift_status_file"),
+            drift_bins=config.get("drift_bins", 10),
+            psi_threshold=config.get("psi_threshold", 0.2),
+            ks_threshold=config.get("ks_threshold", 0.1),
+            refresh_reference=config.get("refresh_reference", False)
         )
         return data_validation_config
     
@@ -65,8 +99,204 @@ class ConfigurationManager:
             root_dir=Path(config.root_dir),
             data_path=Path(config.data_path),
             numerical_cols= list(config.numerical_cols),
-            categorical_cols= list(config.categorical_cols)
+            categorical_cols= list(config.categorical_cols),
+            columns=list(self.schema.COLUMNS.keys()),
+            target_column=self.schema.TARGET_COLUMN.name,
+            fit_mode=config.get("fit_mode", "memory"),
+            chunk_size=config.get("chunk_size", 100000),
+            sketch_size=config.get("sketch_size", 4096),
+            test_size=config.get("test_size", 0.25),
+            random_state=config.get("random_state", 42),
+            persist_splits=config.get("persist_splits", True)
         )
         return data_transformation_config
 
 
+    def get_model_trainer_config(self) -> ModelTrainerConfig:
+        config = self.config.model_trainer
+        params = self.params.XGBRegressor
+
+        create_directories([config.root_dir])
+
+        model_trainer_config = ModelTrainerConfig(
+            root_dir=Path(config.root_dir),
+            train_data_dir=Path(config.train_data_dir),
+            train_target_path=Path(config.train_target_path),
+            feature_names_path=Path(config.feature_names_path),
+            model_name=config.model_name,
+            metrics_file=Path(config.metrics_file),
+            params=params.to_dict(),
+            search_params=self.params.search.to_dict() if "search" in self.params else {"enabled": False},
+            search_log=Path(config.search_log),
+            best_params_file=Path(config.best_params_file),
+            numerical_cols=list(self.config.data_transformation.numerical_cols),
+            categorical_cols=list(self.config.data_transformation.categorical_cols),
+            target_column=self.schema.TARGET_COLUMN.name,
+            mode=config.get("mode", "full"),
+            model_type=config.get("model_type", "xgboost"),
+            linear_model_name=config.get("linear_model_name", "linear_model.joblib"),
+            linear_params=self.params.SGDRegressor.to_dict() if "SGDRegressor" in self.params else {},
+            data_path=Path(config.data_path),
+            preprocessor_path=Path(config.preprocessor_path),
+            state_file=Path(config.state_file),
+            preprocessor_state_file=Path(config.preprocessor_state_file),
+            train_rows_path=Path(config.get("train_rows_path", "artifacts/data_transformation/train_rows.npy")),
+            watermark_column=config.get("watermark_column"),
+            seen_rows_file=Path(config.get("seen_rows_file", os.path.join(config.root_dir, "seen_rows.npy"))),
+            holdout_file=Path(config.get("holdout_file", os.path.join(config.root_dir, "holdout.parquet"))),
+            full_rebuild_every=config.get("full_rebuild_every", 12),
+            incremental_rounds=config.get("incremental_rounds", 100),
+            chunk_size=config.get("chunk_size", 100000)
+        )
+        return model_trainer_config
+
+
+    def trained_model_path(self) -> Path:
+        """The model file the trainer writes for model_trainer.model_type, as ModelTrainer.model_path"""
+        config = self.config.model_trainer
+        if config.get("model_type", "xgboost") == "xgboost":
+            return Path(config.root_dir) / config.model_name
+        return Path(config.root_dir) / config.get("linear_model_name", "linear_model.joblib")
+
+
+    def get_model_evaluation_config(self) -> ModelEvaluationConfig:
+        config = self.config.model_evaluation
+        trainer_config = self.config.model_trainer
+
+        create_directories([config.root_dir])
+
+        model_evaluation_config = ModelEvaluationConfig(
+            root_dir=Path(config.root_dir),
+            test_data_dir=Path(config.test_data_dir),
+            test_target_path=Path(config.test_target_path),
+            feature_names_path=Path(config.feature_names_path),
+            model_path=self.trained_model_path(),
+            metrics_file=Path(config.metrics_file),
+            batch_size=config.get("batch_size", 100000),
+            slice_columns=list(config.get("slice_columns", [])),
+            n_bootstrap=config.get("n_bootstrap", 2000),
+            confidence_level=config.get("confidence_level", 0.95),
+            bootstrap_block_elements=config.get("bootstrap_block_elements", 20000000),
+            random_state=config.get("random_state", 42),
+            target_column=self.schema.TARGET_COLUMN.name,
+            # After incremental runs the model is scored on the last full rebuild's holdout, transformed
+            # with the preprocessor bound to the model (ModelTrainer.preprocessor_path)
+            training_state_file=Path(trainer_config.state_file),
+            holdout_path=Path(trainer_config.get("holdout_file", os.path.join(trainer_config.root_dir, "holdout.parquet"))),
+            preprocessor_path=Path(trainer_config.root_dir) / "preprocessor_obj.joblib"
+        )
+        return model_evaluation_config
+
+
+    def get_prediction_config(self) -> PredictionConfig:
+        config = self.config.prediction
+        target_column = self.schema.TARGET_COLUMN.name
+
+        prediction_config = PredictionConfig(
+            preprocessor_path=Path(config.preprocessor_path),
+            model_path=self.trained_model_path(),
+            columns={name: dtype for name, dtype in self.schema.COLUMNS.items() if name != target_column},
+            compiled_preprocessor_path=Path(config.compiled_preprocessor_path),
+            use_compiled_preprocessor=config.get("use_compiled_preprocessor", True),
+            latency_window=config.get("latency_window", 10000),
+            micro_batching=config.get("micro_batching", True),
+            max_batch_size=config.get("max_batch_size", 64),
+            max_wait_ms=config.get("max_wait_ms", 5),
+            max_batch_rows=config.get("max_batch_rows", 100000),
+            cache_enabled=config.get("cache_enabled", True),
+            cache_max_entries=config.get("cache_max_entries", 100000),
+            cache_max_bytes=config.get("cache_max_bytes", 64 * 1024 * 1024),
+            cache_ttl_seconds=config.get("cache_ttl_seconds", 3600),
+            hot_reload=config.get("hot_reload", True),
+            reload_poll_seconds=config.get("reload_poll_seconds", 5),
+            canary_path=Path(config.canary_path) if config.get("canary_path") else None,
+            canary_rows=config.get("canary_rows", 256)
+        )
+        return prediction_config
+
+
+    def get_batch_prediction_config(self) -> BatchPredictionConfig:
+        config = self.config.get("batch_prediction", {})
+
+        batch_prediction_config = BatchPredictionConfig(
+            chunk_size=config.get("chunk_size", 100000),
+            n_workers=config.get("n_workers", 4),
+            max_in_flight=config.get("max_in_flight", 8),
+            prediction_column=config.get("prediction_column", "PredictedElectricityBill"),
+            log_every=config.get("log_every", 10)
+        )
+        return batch_prediction_config
+
+
+    def get_stage_cache_config(self) -> StageCacheConfig:
+        config = self.config.stage_cache
+
+        create_directories([config.root_dir])
+
+        stage_cache_config = StageCacheConfig(
+            root_dir=Path(config.root_dir),
+            force_rerun=list(config.force_rerun)
+        )
+        return stage_cache_config
+
+
+    def get_pipeline_config(self) -> PipelineConfig:
+        config = self.config.pipeline
+        # {model_path} stands for the model file of the configured model_type
+        model_path = self.trained_model_path().as_posix()
+
+        def resolve(names) -> list:
+            return [name.replace("{model_path}", model_path) for name in names]
+
+        pipeline_config = PipelineConfig(
+            stages=[
+                PipelineStageConfig(
+                    name=stage.name,
+                    inputs=resolve(stage.get("inputs", [])),
+                    outputs=resolve(stage.get("outputs", []))
+                )
+                for stage in config.stages
+            ],
+            max_workers=config.get("max_workers", 2)
+        )
+        return pipeline_config
+
+
+    def get_artifact_store_config(self) -> ArtifactStoreConfig:
+        config = self.config.get("artifact_store", {})
+
+        artifact_store_config = ArtifactStoreConfig(
+            root_dir=Path(config.get("root_dir", "artifacts/artifact_store")),
+            enabled=config.get("enabled", True),
+            keep_runs=config.get("keep_runs", 20)
+        )
+        return artifact_store_config
+
+
+    def get_logging_config(self) -> LoggingConfig:
+        config = self.config.get("logging", {})
+
+        logging_config = LoggingConfig(
+            level=config.get("level", "INFO"),
+            levels=dict(config.get("levels") or {}),
+            console=config.get("console", True),
+            console_format=config.get("console_format", "text"),
+            log_file=config.get("log_file", "logs/electricity_bill.log"),
+            file_format=config.get("file_format", "text"),
+            max_bytes=config.get("max_bytes", 10 * 1024 * 1024),
+            backup_count=config.get("backup_count", 5)
+        )
+        return logging_config
+
+
+    def get_profiling_config(self) -> ProfilingConfig:
+        config = self.config.get("profiling", {})
+
+        profiling_config = ProfilingConfig(
+            root_dir=Path(config.get("root_dir", "artifacts/profiling")),
+            enabled=config.get("enabled", True),
+            cprofile=config.get("cprofile", False),
+            cprofile_top=config.get("cprofile_top", 30),
+            rss_sample_interval=config.get("rss_sample_interval", 0.05)
+        )
+        return profiling_config
@@ -2,6 +2,8 @@ from pathlib import Path
 import os
 import sys
 
-CONFIG_FILE_PATH = Path("config\config.yaml")
+CONFIG_FILE_PATH = Path("config/config.yaml")
 PARAMS_FILE_PATH = Path("params.yaml")
-SCHEMA_FILE_PATH = Path("schema.yaml")
\ No newline at end of file
+SCHEMA_FILE_PATH = Path("schema.yaml")
+# Parsed yaml files, reused while the files are unchanged
+YAML_CACHE_PATH = Path(".cache/yaml_cache.pkl")
@@ -1,5 +1,6 @@
 from dataclasses import dataclass 
 from pathlib import Path 
+from typing import Optional
 
 
 @dataclass()
@@ -8,6 +9,17 @@ class DataIngestionConfig:
     source_URL: str
     local_data_file: Path 
     unzip_dir: Path
+    expected_sha256: Optional[str] = None
+    expected_size: Optional[int] = None
+    chunk_size: int = 1024 * 1024
+    timeout: float = 30
+    max_retries: int = 5
+    backoff_seconds: float = 2
+    members: Optional[list] = None
+    extract_manifest: Optional[Path] = None
+    csv_file: Optional[Path] = None
+    parquet_file: Optional[Path] = None
+    all_schema: Optional[dict] = None
 
 @dataclass
 class DataValidationConfig:
@@ -15,6 +27,24 @@ class DataValidationConfig:
     STATUS_FILE: str
     unzip_data_dir: Path
     all_schema: dict 
+    constraints: dict
+    report_file: Path
+    chunk_size: int = 100000
+    names_only: bool = False
+    fail_fast: bool = True
+    profile: bool = False
+    profile_file: Optional[Path] = None
+    profile_workers: int = 1
+    sketch_size: int = 256
+    top_k: int = 10
+    drift_check: bool = False
+    reference_profile: Optional[Path] = None
+    drift_report_file: Optional[Path] = None
+    drift_status_file: Optional[Path] = None
+    drift_bins: int = 10
+    psi_threshold: float = 0.2
+    ks_threshold: float = 0.1
+    refresh_reference: bool = False
 
 
 @dataclass
@@ -23,3 +53,141 @@ class DataTransformationConfig:
     data_path: Path
     numerical_cols: list
     categorical_cols: list
+    columns: list
+    target_column: str
+    fit_mode: str = "memory"
+    chunk_size: int = 100000
+    sketch_size: int = 4096
+    test_size: float = 0.25
+    random_state: int = 42
+    persist_splits: bool = True
+
+
+@dataclass
+class ModelTrainerConfig:
+    root_dir: Path
+    train_data_dir: Path
+    train_target_path: Path
+    feature_names_path: Path
+    model_name: str
+    metrics_file: Path
+    params: dict
+    search_params: dict
+    search_log: Path
+    best_params_file: Path
+    numerical_cols: list
+    categorical_cols: list
+    target_column: str
+    mode: str = "full"
+    model_type: str = "xgboost"
+    linear_model_name: str = "linear_model.joblib"
+    linear_params: dict = None
+    data_path: Optional[Path] = None
+    preprocessor_path: Optional[Path] = None
+    state_file: Optional[Path] = None
+    preprocessor_state_file: Optional[Path] = None
+    train_rows_path: Optional[Path] = None
+    watermark_column: Optional[str] = None
+    seen_rows_file: Optional[Path] = None
+    holdout_file: Optional[Path] = None
+    full_rebuild_every: int = 12
+    incremental_rounds: int = 100
+    chunk_size: int = 100000
+
+
+@dataclass
+class ModelEvaluationConfig:
+    root_dir: Path
+    test_data_dir: Path
+    test_target_path: Path
+    feature_names_path: Path
+    model_path: Path
+    metrics_file: Path
+    batch_size: int = 100000
+    slice_columns: list = None
+    n_bootstrap: int = 2000
+    confidence_level: float = 0.95
+    bootstrap_block_elements: int = 20000000
+    random_state: int = 42
+    target_column: Optional[str] = None
+    training_state_file: Optional[Path] = None
+    holdout_path: Optional[Path] = None
+    preprocessor_path: Optional[Path] = None
+
+
+@dataclass
+class PredictionConfig:
+    preprocessor_path: Path
+    model_path: Path
+    columns: dict
+    compiled_preprocessor_path: Optional[Path] = None
+    use_compiled_preprocessor: bool = True
+    latency_window: int = 10000
+    micro_batching: bool = True
+    max_batch_size: int = 64
+    max_wait_ms: float = 5
+    max_batch_rows: int = 100000
+    cache_enabled: bool = True
+    cache_max_entries: int = 100000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_seconds: float = 3600
+    hot_reload: bool = True
+    reload_poll_seconds: float = 5
+    canary_path: Optional[Path] = None
+    canary_rows: int = 256
+
+
+@dataclass
+class BatchPredictionConfig:
+    chunk_size: int = 100000
+    n_workers: int = 4
+    max_in_flight: int = 8
+    prediction_column: str = "PredictedElectricityBill"
+    log_every: int = 10
+
+
+@dataclass
+class StageCacheConfig:
+    root_dir: Path
+    force_rerun: list
+
+
+@dataclass
+class PipelineStageConfig:
+    name: str
+    inputs: list
+    outputs: list
+
+
+@dataclass
+class PipelineConfig:
+    stages: list
+    max_workers: int = 2
+
+
+@dataclass
+class ArtifactStoreConfig:
+    root_dir: Path
+    enabled: bool = True
+    keep_runs: int = 20
+
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    levels: Optional[dict] = None
+    console: bool = True
+    console_format: str = "text"
+    log_file: Optional[str] = None
+    file_format: str = "text"
+    max_bytes: int = 10 * 1024 * 1024
+    backup_count: int = 5
+
+
+@dataclass
+class ProfilingConfig:
+    root_dir: Path
+    enabled: bool = True
+    cprofile: bool = False
+    cprofile_top: int = 30
+    rss_sample_interval: float = 0.05
@@ -1,26 +1,151 @@
-# import logging
-# import os
-# import sys
-# from datetime import datetime
-
-# # Define the logfile name using the current date and time
-# log_file_name = f"{datetime.now().strftime('%m_%d_%H_%M_%S')}.log"
-
-# # Create the path to the log file inside the log directory
-# log_file_path = os.path.join(os.getcwd(), "logs", log_file_name)
-
-# # Create the log directory if it does not exist
-# os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-
-# # Configure basic logging settings
-# logging.basicConfig(
-#     #filename=log_file_path,  # Set the filename for logging
-#     format="[%(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",  # Define log format
-#     level=logging.INFO,  # Set logging level to DEBUG
-#     handlers=[
-#         logging.FileHandler(log_file_path),  # Output logs to file
-#         logging.StreamHandler(sys.stdout)  # Output logs to console
-#     ]
-# )
-
-# logger = logging.getLogger("ElectricityBill")
\ No newline at end of file
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from src.ElectricityBill.entity.config_entity import LoggingConfig
+
+
+LOG_FORMAT = "[%(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has, anything else was passed with extra= and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+_setup = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed as extra= kept as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in data:
+                data[key] = value
+        return json.dumps(data, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues a copy of the record with its message and traceback rendered, keeping the extra= fields"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        # Render the message and traceback now, the arguments may change or not pickle later
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter(kind: str) -> logging.Formatter:
+    if kind == "json":
+        return JsonFormatter()
+    if kind != "text":
+        raise ValueError(f"Unknown log format {kind}, expected text or json")
+    # Formatter.format appends the exc_text rendered by the queue handler
+    return logging.Formatter(LOG_FORMAT)
+
+
+def setup_logging(config: LoggingConfig = None, to_file: bool = True):
+    """
+    Routes every log record through a queue to a background writer thread, so a logging call
+    never blocks on the console or the log file. Called by the entry points (main.py, app.py,
+    batch_predict.py, the stage scripts); importing the package installs no handlers.
+    Calling it again replaces the previous setup, and a forked child process (a preloading
+    WSGI server's workers) redoes it, see _after_fork.
+
+    Args:
+        config (LoggingConfig): logging settings, config.yaml logging section when None
+        to_file (bool): False for worker processes, which share the console but not the rotated file
+    """
+    global _listener, _queue_handler, _setup
+    if config is None:
+        # Imported here, the configuration module imports this package
+        from src.ElectricityBill.config.configuration import ConfigurationManager
+        config = ConfigurationManager().get_logging_config()
+
+    handlers = []
+    if config.console:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(_formatter(config.console_format))
+        handlers.append(console)
+    if to_file and config.log_file:
+        # {pid} gives every process of a multi-process server its own file, rotation is not process safe
+        path = str(config.log_file).format(pid=os.getpid())
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.max_bytes, backupCount=config.backup_count, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(_formatter(config.file_format))
+        handlers.append(file_handler)
+
+    with _lock:
+        stop_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        records = queue.SimpleQueue()
+        _queue_handler = _QueueHandler(records)
+        root.addHandler(_queue_handler)
+        root.setLevel(config.level)
+        for name, level in (config.levels or {}).items():
+            logging.getLogger(name).setLevel(level)
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        _setup = (config, to_file)
+
+
+def stop_logging():
+    """Writes out the queued records and stops the writer thread, registered to run at exit"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _after_fork():
+    """
+    The writer thread does not survive a fork, so a forked child would queue its records with
+    nobody to write them, and under the parent's {pid}. The child starts its own listener with
+    the parent's settings instead. The parent's handlers are dropped without flushing, whatever
+    is still queued belongs to the parent.
+    """
+    global _listener, _queue_handler, _lock
+    if _setup is None:
+        return
+    # A parent thread may have held the lock at the fork
+    _lock = threading.Lock()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    setup_logging(*_setup)
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,163 @@
+import os
+import time
+import dataclasses
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xgboost as xgb
+from src.ElectricityBill.config.configuration import ConfigurationManager
+from src.ElectricityBill.entity.config_entity import BatchPredictionConfig, PredictionConfig
+from src.ElectricityBill.pipelines.prediction_pipeline import PredictionPipeline
+from src.ElectricityBill.utils.commons import process_pool_context
+from src.ElectricityBill import logging, setup_logging
+
+
+# Set once per worker process by _init_worker, so the model is loaded once and not pickled per chunk
+_WORKER_PIPELINE = None
+
+
+def _init_worker(prediction_config: PredictionConfig, n_threads: int):
+    global _WORKER_PIPELINE
+    # Workers log to the console only, the parent process owns the rotated log file
+    setup_logging(to_file=False)
+    # Every chunk is scored once, a cache would only cost memory
+    _WORKER_PIPELINE = PredictionPipeline(dataclasses.replace(prediction_config, cache_enabled=False))
+    if isinstance(_WORKER_PIPELINE.model, xgb.Booster):
+        _WORKER_PIPELINE.model.set_param({"nthread": n_threads})
+
+
+def _score_chunk(frame: pd.DataFrame) -> np.ndarray:
+    return _WORKER_PIPELINE.predict(frame)
+
+
+def read_chunks(path: str, chunk_size: int, columns: dict):
+    """
+    Yields the input file chunk_size rows at a time, from Parquet row batches or CSV chunks.
+    CSV numeric columns are read as float64 so that every chunk has the same types
+    """
+    if str(path).endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        dtypes = {col: "float64" for col, dtype in columns.items() if dtype != "object"}
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtypes)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a Parquet or CSV file, written under a temporary name until close()"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.tmp_path = f"{self.path}.tmp"
+        self.parquet = self.path.endswith(".parquet")
+        self.writer = None
+        self.file = None
+
+
+    def write(self, frame: pd.DataFrame):
+        if self.parquet:
+            if self.writer is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                self.writer = pq.ParquetWriter(self.tmp_path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False)
+            self.writer.write_table(table)
+        else:
+            header = self.file is None
+            if header:
+                self.file = open(self.tmp_path, "w", newline="")
+            frame.to_csv(self.file, header=header, index=False)
+
+
+    def close(self, complete: bool = True):
+        """Moves the output to its final name, or deletes it when scoring did not complete"""
+        if self.writer is not None:
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            if complete:
+                os.replace(self.tmp_path, self.path)
+            else:
+                os.remove(self.tmp_path)
+
+
+class BatchPredictionPipeline:
+    """Scores a CSV or Parquet file of any size chunk by chunk, in constant memory.
+
+    Chunks are scored by a pool of worker processes that each load the preprocessor and the
+    model once. At most max_in_flight chunks are read ahead, and results are written in input
+    order as soon as the oldest chunk is done.
+    """
+
+    def __init__(self, config: BatchPredictionConfig = None, prediction_config: PredictionConfig = None):
+        config_manager = None
+        if config is None or prediction_config is None:
+            config_manager = ConfigurationManager()
+        self.config = config or config_manager.get_batch_prediction_config()
+        self.prediction_config = prediction_config or config_manager.get_prediction_config()
+
+
+    def run(self, input_path: str, output_path: str) -> dict:
+        """
+        Scores input_path into output_path, keeping the input columns and adding prediction_column.
+        Function returns the rows, chunks, seconds and rows per second
+        """
+        n_workers = self.config.n_workers
+        max_in_flight = max(1, self.config.max_in_flight)
+        chunks = read_chunks(input_path, self.config.chunk_size, self.prediction_config.columns)
+        writer = ChunkWriter(output_path)
+        start = time.perf_counter()
+        n_rows = n_chunks = 0
+
+        def write(frame, predictions):
+            nonlocal n_rows, n_chunks
+            frame[self.config.prediction_column] = predictions
+            writer.write(frame)
+            n_rows += len(frame)
+            n_chunks += 1
+            if n_chunks % self.config.log_every == 0:
+                logging.info(f"Scored {n_rows} rows, {n_rows / (time.perf_counter() - start):.0f} rows/s")
+
+        try:
+            if n_workers <= 0:
+                # In-process, e.g. on a single core where workers only add pickling
+                _init_worker(self.prediction_config, n_threads=os.cpu_count() or 1)
+                for frame in chunks:
+                    write(frame, _score_chunk(frame))
+            else:
+                n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+                # Not forked: this process runs the logging and XGBoost threads
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                         initargs=(self.prediction_config, n_threads),
+                                         mp_context=process_pool_context()) as executor:
+                    pending = deque()
+                    for frame in chunks:
+                        # Only the model inputs are sent to the workers
+                        features = frame[[col for col in frame.columns if col in self.prediction_config.columns]]
+                        pending.append((frame, executor.submit(_score_chunk, features)))
+                        if len(pending) >= max_in_flight:
+                            frame, future = pending.popleft()
+                            write(frame, future.result())
+                    while pending:
+                        frame, future = pending.popleft()
+                        write(frame, future.result())
+        except Exception as e:
+            writer.close(complete=False)
+            logging.error(f"Error scoring {input_path}: {e}")
+            raise e
+        writer.close()
+
+        seconds = time.perf_counter() - start
+        summary = {
+            "rows": n_rows,
+            "chunks": n_chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(n_rows / seconds, 1) if seconds > 0 else None,
+        }
+        logging.info(f"Scored {input_path} into {output_path}: {summary}")
+        return summary
@@ -0,0 +1,375 @@
+import os
+import time
+import hashlib
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import xgboost as xgb
+from src.ElectricityBill.config.configuration import ConfigurationManager
+from src.ElectricityBill.entity.config_entity import PredictionConfig
+from src.ElectricityBill.utils.compiled_preprocessor import CompiledPreprocessor
+from src.ElectricityBill.utils.prediction_cache import PredictionCache
+from src.ElectricityBill.utils.commons import load_bin
+from src.ElectricityBill import logging
+
+
+def artifact_paths(config: PredictionConfig) -> list:
+    """The preprocessor (compiled export when enabled and present) and the model files a pipeline loads"""
+    if config.use_compiled_preprocessor and os.path.exists(config.compiled_preprocessor_path):
+        return [config.compiled_preprocessor_path, config.model_path]
+    return [config.preprocessor_path, config.model_path]
+
+
+def artifact_version(paths: list) -> str:
+    """Short id of the artifact files, changes whenever one of them is rewritten"""
+    digest = hashlib.blake2b(digest_size=6)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+class PredictionPipeline:
+    """Loads the preprocessor and the model once and predicts bills for raw schema.yaml records"""
+
+    def __init__(self, config: PredictionConfig = None):
+        self.config = config or ConfigurationManager().get_prediction_config()
+        self.cache = None
+        if self.config.cache_enabled:
+            self.cache = PredictionCache(
+                max_entries=self.config.cache_max_entries,
+                max_bytes=self.config.cache_max_bytes,
+                ttl_seconds=self.config.cache_ttl_seconds
+            )
+        self.load()
+
+
+    def load(self):
+        """Loads the preprocessor and the model, and drops the predictions cached for the previous ones"""
+        start = time.perf_counter()
+        paths = artifact_paths(self.config)
+        # Taken before loading: if a file is rewritten meanwhile the version changes and a reload follows
+        self.version = artifact_version(paths)
+        self.preprocessor = None
+        self.compiled_preprocessor = None
+        if paths[0] == self.config.compiled_preprocessor_path:
+            # Pure NumPy transform, skips the pandas and sklearn validation overhead per call
+            self.compiled_preprocessor = CompiledPreprocessor.load(self.config.compiled_preprocessor_path)
+            self.feature_columns = list(self.compiled_preprocessor.input_columns)
+        else:
+            # Memory-mapped read-only, the serving and batch workers share the arrays' pages
+            self.preprocessor = load_bin(self.config.preprocessor_path, mmap_mode="r")
+            # The preprocessor checks column names, keep the order it was fitted with
+            self.feature_columns = list(self.preprocessor.feature_names_in_)
+        if str(self.config.model_path).endswith(".json"):
+            self.model = xgb.Booster()
+            self.model.load_model(self.config.model_path)
+            try:
+                # Ignore the trees grown after the early stopping optimum
+                self.iteration_range = (0, self.model.best_iteration + 1)
+            except AttributeError:
+                self.iteration_range = (0, 0)
+        else:
+            self.model = load_bin(self.config.model_path, mmap_mode="r")
+            self.iteration_range = None
+        self.numeric_columns = {col for col in self.feature_columns if self.config.columns.get(col) != "object"}
+        if self.cache is not None:
+            self.cache.clear()
+        logging.info(f"Loaded preprocessor and model {self.config.model_path} (version {self.version}) in {time.perf_counter() - start:.2f}s")
+
+
+    def categories(self) -> dict:
+        """Known values of every categorical column, e.g. for the form's drop-downs"""
+        if self.compiled_preprocessor is not None:
+            return {
+                col: values
+                for block in self.compiled_preprocessor.blocks if block["kind"] == "onehot"
+                for col, values in zip(block["columns"], block["categories"])
+            }
+        categorical = self.preprocessor.named_transformers_["categorical"]
+        columns = {name: cols for name, _, cols in self.preprocessor.transformers_}["categorical"]
+        encoder = categorical.named_steps["onehot"]
+        return {col: [str(value) for value in values] for col, values in zip(columns, encoder.categories_)}
+
+
+    def to_frame(self, records) -> pd.DataFrame:
+        """
+        Builds the model input frame from a list of dicts keyed by the schema.yaml columns, or
+        from a DataFrame read from an uploaded CSV.
+        Numbers may come in as strings (form posts); missing values may be None or "".
+        Raises ValueError naming the missing columns or the column that could not be converted
+        """
+        frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(records)
+        missing = [col for col in self.feature_columns if col not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+
+        columns = {}
+        for col in self.feature_columns:
+            values = frame[col]
+            # pandas 3 reads text into the string dtype rather than object
+            if pd.api.types.is_string_dtype(values) or values.dtype == object:
+                values = values.where(values != "", None)
+            if self.config.columns.get(col) == "object":
+                columns[col] = values.astype("object")
+                continue
+            try:
+                columns[col] = pd.to_numeric(values).astype("float64")
+            except (TypeError, ValueError):
+                raise ValueError(f"Column {col} must be numeric")
+        return pd.DataFrame(columns)
+
+
+    def cache_key(self, record: dict):
+        """
+        Cache key of one record: numbers as floats, categories as strings and None for missing
+        values, so "120", 120 and 120.0 share an entry.
+        Function returns None when the record cannot be normalized, it is then predicted uncached
+        and predict raises the usual error
+        """
+        values = []
+        for col in self.feature_columns:
+            if col not in record:
+                return None
+            value = record[col]
+            if value is None or value != value or value == "":
+                values.append(None)
+            elif col in self.numeric_columns:
+                try:
+                    values.append(float(value))
+                except (TypeError, ValueError):
+                    return None
+            else:
+                values.append(str(value))
+        return PredictionCache.make_key(tuple(values))
+
+
+    def predict(self, records) -> np.ndarray:
+        """
+        Predicted electricity bills, one per record. Records found in the cache are not
+        recomputed; the others go through one vectorized transform and predict call.
+        DataFrames (CSV uploads) bypass the cache
+        """
+        if self.cache is None or isinstance(records, pd.DataFrame):
+            return self._predict(records)
+
+        keys = [self.cache_key(record) for record in records]
+        predictions = np.empty(len(records), dtype="float64")
+        misses = []
+        for i, key in enumerate(keys):
+            value = self.cache.get(key) if key is not None else None
+            if value is None:
+                misses.append(i)
+            else:
+                predictions[i] = value
+        if misses:
+            fresh = self._predict([records[i] for i in misses])
+            predictions[misses] = fresh
+            for i, value in zip(misses, fresh):
+                if keys[i] is not None:
+                    self.cache.put(keys[i], float(value))
+        return predictions
+
+
+    def _predict(self, records) -> np.ndarray:
+        if self.compiled_preprocessor is not None:
+            # The booster was trained on sparse matrices whose zeros it reads as missing
+            zeros_as_missing = isinstance(self.model, xgb.Booster) and self.compiled_preprocessor.sparse_output
+            X = self.compiled_preprocessor.transform(records, zeros_as_missing=zeros_as_missing)
+        else:
+            X = self.preprocessor.transform(self.to_frame(records))
+        if isinstance(self.model, xgb.Booster):
+            return self.model.inplace_predict(X, iteration_range=self.iteration_range)
+        return self.model.predict(X)
+
+
+class MicroBatcher:
+    """Groups concurrent single-record predictions into one vectorized call.
+
+    Requests are queued; a background thread takes the first one, waits at most
+    max_wait_ms for up to max_batch_size - 1 others and predicts them together.
+    """
+
+    def __init__(self, pipeline: PredictionPipeline, max_batch_size: int = 64, max_wait_ms: float = 5):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batch_sizes = deque(maxlen=10000)
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+
+    def submit(self, record: dict) -> Future:
+        future = Future()
+        self.queue.put((record, future))
+        return future
+
+
+    def predict(self, record: dict, timeout: float = None) -> tuple:
+        """
+        Predicted bill of one record and the version of the model that made it.
+        Raises the same ValueError as PredictionPipeline.predict
+        """
+        return self.submit(record).result(timeout)
+
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._predict(items)
+
+
+    def _predict(self, items: list):
+        self.batch_sizes.append(len(items))
+        # The whole batch uses one pipeline even if a reload swaps self.pipeline meanwhile
+        pipeline = self.pipeline
+        try:
+            predictions = pipeline.predict([record for record, _ in items])
+        except Exception:
+            # One invalid record must not fail the others: retry them one by one
+            for record, future in items:
+                try:
+                    future.set_result((float(pipeline.predict([record])[0]), pipeline.version))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(items, predictions):
+            future.set_result((float(prediction), pipeline.version))
+
+
+    def summary(self) -> dict:
+        sizes = np.array(self.batch_sizes)
+        return {
+            "batches": len(sizes),
+            "mean_batch_size": round(float(sizes.mean()), 2) if len(sizes) else None,
+            "max_batch_size": int(sizes.max()) if len(sizes) else None,
+        }
+
+
+class ModelReloader:
+    """Holds the active PredictionPipeline and replaces it when the artifacts change.
+
+    A new pipeline is loaded next to the active one, must predict a canary batch of finite
+    values and only then becomes self.pipeline in one reference assignment. Requests that
+    already took the old pipeline finish with it, new ones get the new one, nothing waits
+    for the load. watch() polls the artifact files; reload() can also be called directly.
+    """
+
+    def __init__(self, pipeline: PredictionPipeline, poll_seconds: float = 5, canary_path: Path = None, canary_rows: int = 256):
+        self.pipeline = pipeline
+        self.poll_seconds = poll_seconds
+        self.canary_path = canary_path
+        self.canary_rows = canary_rows
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.reloads = 0
+        self.last_reload = None
+        self.last_error = None
+        self.rejected_version = None
+        self.thread = None
+
+
+    def canary_records(self, pipeline: PredictionPipeline) -> list:
+        """First canary_rows rows of canary_path, or a single record of missing values the preprocessor imputes"""
+        if self.canary_path is not None and os.path.exists(self.canary_path):
+            if str(self.canary_path).endswith(".parquet"):
+                # Only the first row batch of the feature columns, not the whole dataset
+                parquet_file = pq.ParquetFile(self.canary_path)
+                columns = [col for col in pipeline.feature_columns if col in parquet_file.schema_arrow.names]
+                batch = next(parquet_file.iter_batches(batch_size=self.canary_rows, columns=columns), None)
+                if batch is None:
+                    return [{col: None for col in pipeline.feature_columns}]
+                frame = batch.to_pandas()
+            else:
+                frame = pd.read_csv(self.canary_path, nrows=self.canary_rows)
+            frame = frame[[col for col in pipeline.feature_columns if col in frame.columns]]
+            return [
+                {col: None if pd.isna(value) else value for col, value in record.items()}
+                for record in frame.to_dict("records")
+            ]
+        return [{col: None for col in pipeline.feature_columns}]
+
+
+    def validate(self, candidate: PredictionPipeline):
+        """Predicts the canary batch with the candidate, raises ValueError if it fails or is not finite"""
+        records = self.canary_records(candidate)
+        predictions = np.asarray(candidate._predict(records), dtype="float64")
+        if predictions.shape != (len(records),) or not np.all(np.isfinite(predictions)):
+            raise ValueError(f"Model version {candidate.version} gave invalid predictions on the canary batch")
+        # The canary also warms the new model up before it takes traffic
+        current = np.asarray(self.pipeline._predict(records), dtype="float64")
+        logging.info(f"Canary batch of {len(records)} records: mean absolute change {np.mean(np.abs(predictions - current)):.4f}")
+
+
+    def reload(self, force: bool = False) -> dict:
+        """
+        Loads, validates and swaps in the current artifacts.
+        Function returns the status, the active version and the previous one
+        """
+        with self.lock:
+            version = artifact_version(artifact_paths(self.pipeline.config))
+            if version == self.pipeline.version and not force:
+                return {"status": "unchanged", "version": version}
+            previous = self.pipeline
+            try:
+                candidate = PredictionPipeline(previous.config)
+                self.validate(candidate)
+            except Exception as e:
+                self.last_error = str(e)
+                self.rejected_version = version
+                logging.error(f"Keeping model version {previous.version}, reload of {version} failed: {e}")
+                return {"status": "failed", "version": previous.version, "error": str(e)}
+
+            self.pipeline = candidate
+            for listener in self.listeners:
+                listener(candidate)
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_error = None
+            logging.info(f"Swapped model version {previous.version} for {candidate.version}")
+            return {"status": "reloaded", "version": candidate.version, "previous_version": previous.version}
+
+
+    def watch(self):
+        """Starts the background thread that reloads when the artifact files change"""
+        self.thread = threading.Thread(target=self._watch, name="model-reloader", daemon=True)
+        self.thread.start()
+
+
+    def _watch(self):
+        seen = None
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                version = artifact_version(artifact_paths(self.pipeline.config))
+            except OSError:
+                # A file is being replaced, look again on the next poll
+                continue
+            # Reload once the files stopped changing for a poll, the trainer writes several of them
+            if version == seen and version not in (self.pipeline.version, self.rejected_version):
+                self.reload()
+            seen = version
+
+
+    def summary(self) -> dict:
+        return {
+            "version": self.pipeline.version,
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
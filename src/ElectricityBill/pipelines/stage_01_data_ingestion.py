@@ -1,23 +1,48 @@
+import sys
 from src.ElectricityBill.config.configuration import ConfigurationManager
-from src.ElectricityBill.components.data_ingestion import DataIngestion
-from src.ElectricityBill import logging
+from src.ElectricityBill.utils.stage_cache import StageCache
+from src.ElectricityBill.utils.profiling import profile_stage, step
+from src.ElectricityBill import logging, setup_logging
 
 
 STAGE_NAME = "Data Ingestion stage"
+STAGE_KEY = "data_ingestion"
+# Imported only once the stage cache says the stage has to run
+COMPONENT_MODULE = "src.ElectricityBill.components.data_ingestion"
 
 class DataIngestionPipeline:
-    def __init__(self):
-        pass 
+    def __init__(self, force: bool = False):
+        self.force = force
 
+    @profile_stage(STAGE_KEY)
     def main(self):
         config = ConfigurationManager()
         data_ingestion_config = config.get_data_ingestion_config()
+
+        # Skip the stage when nothing it depends on has changed since the last run
+        stage_cache = StageCache(config=config.get_stage_cache_config())
+        fingerprint = stage_cache.fingerprint(
+            input_files=[],
+            sections={"data_ingestion": config.config.data_ingestion, "schema": config.schema.COLUMNS},
+            modules=[COMPONENT_MODULE, sys.modules[__name__]]
+        )
+        if stage_cache.is_fresh(STAGE_KEY, fingerprint, force=self.force):
+            return
+
+        from src.ElectricityBill.components.data_ingestion import DataIngestion
         data_ingestion = DataIngestion(config=data_ingestion_config)
-        data_ingestion.download_file()
-        data_ingestion.extract_zip_file()
+        with step("download"):
+            data_ingestion.download_file()
+        with step("extract"):
+            extracted_files = data_ingestion.extract_zip_file()
+        with step("convert_to_parquet"):
+            parquet_file = data_ingestion.convert_to_parquet()
+
+        stage_cache.record(STAGE_KEY, fingerprint, [data_ingestion_config.local_data_file, parquet_file] + extracted_files)
 
 
 if __name__ == "__main__":
+    setup_logging()
     try:
         logging.info(f"++++++++++++++++++++++ stage {STAGE_NAME} started ++++++++++++++++++++++++++")
         obj = DataIngestionPipeline()
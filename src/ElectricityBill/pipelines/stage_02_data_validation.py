@@ -1,26 +1,100 @@
+import sys
 from src.ElectricityBill.config.configuration import ConfigurationManager
-from src.ElectricityBill.components.data_validation import DataValidation
-from src.ElectricityBill import logging
+from src.ElectricityBill.utils.stage_cache import StageCache
+from src.ElectricityBill.utils.profiling import profile_stage, step
+from src.ElectricityBill import logging, setup_logging
 
 
 STAGE_NAME = "Data Validation stage"
+STAGE_KEY = "data_validation"
+PROFILING_STAGE_KEY = "data_profiling"
+# Imported only once the stage cache says the stage has to run
+COMPONENT_MODULE = "src.ElectricityBill.components.data_validation"
 
 class DataValidationPipeline:
-    def __init__(self):
-        pass 
+    def __init__(self, force: bool = False):
+        self.force = force
 
+    @profile_stage(STAGE_KEY)
+    def main(self) -> dict:
+        """
+        Validates the data against the schema and the drift reference.
+        Function returns validation_status and drift_status (None when the drift check is off),
+        or None when the stage cache reused the previous run and its status files
+        """
+        config = ConfigurationManager()
+        data_validation_config = config.get_data_validation_config()
+
+        # Skip the stage when neither the data nor the schema has changed since the last run. The drift
+        # reference is written by this stage, it is recorded as an output so replacing it reruns the stage
+        stage_cache = StageCache(config=config.get_stage_cache_config())
+        fingerprint = stage_cache.fingerprint(
+            input_files=[data_validation_config.unzip_data_dir],
+            sections={
+                "data_validation": config.config.data_validation,
+                "schema": config.schema
+            },
+            modules=[COMPONENT_MODULE, sys.modules[__name__]]
+        )
+        if stage_cache.is_fresh(STAGE_KEY, fingerprint, force=self.force):
+            return None
+
+        from src.ElectricityBill.components.data_validation import DataValidation
+        data_validation = DataValidation(config=data_validation_config)
+        with step("validate_all_columns"):
+            validation_status = data_validation.validate_all_columns()
+        outputs = [data_validation_config.STATUS_FILE, data_validation_config.report_file]
+
+        drift_status = None
+        if data_validation_config.drift_check:
+            with step("detect_drift"):
+                drift_status = data_validation.detect_drift()
+            outputs += [
+                data_validation_config.drift_report_file,
+                data_validation_config.drift_status_file,
+                data_validation_config.reference_profile
+            ]
+
+        stage_cache.record(STAGE_KEY, fingerprint, outputs)
+        return {"validation_status": validation_status, "drift_status": drift_status}
+
+
+class DataProfilingPipeline:
+    """Column profile of the ingested data, nothing downstream waits for it"""
+
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @profile_stage(PROFILING_STAGE_KEY)
     def main(self):
         config = ConfigurationManager()
         data_validation_config = config.get_data_validation_config()
+        if not data_validation_config.profile:
+            logging.info("Data profiling is disabled")
+            return
+
+        stage_cache = StageCache(config=config.get_stage_cache_config())
+        fingerprint = stage_cache.fingerprint(
+            input_files=[data_validation_config.unzip_data_dir],
+            sections={"data_validation": config.config.data_validation, "schema": config.schema.COLUMNS},
+            modules=[COMPONENT_MODULE, sys.modules[__name__]]
+        )
+        if stage_cache.is_fresh(PROFILING_STAGE_KEY, fingerprint, force=self.force):
+            return
+
+        from src.ElectricityBill.components.data_validation import DataValidation
         data_validation = DataValidation(config=data_validation_config)
-        data_validation.validate_all_columns()
+        data_validation.profile_data()
+        stage_cache.record(PROFILING_STAGE_KEY, fingerprint, [data_validation_config.profile_file])
 
 
 if __name__ == "__main__":
+    setup_logging()
     try:
         logging.info(f"++++++++++++++++++++++ {STAGE_NAME} started ++++++++++++++++++++++++++")
         obj = DataValidationPipeline()
         obj.main()
+        DataProfilingPipeline().main()
         logging.info(f"********************** {STAGE_NAME} completed ****************\n\nx================x")
 
     except Exception as e:
@@ -1,41 +1,99 @@
+import sys
 from src.ElectricityBill.config.configuration import ConfigurationManager
-from src.ElectricityBill.components.data_transformation import DataTransformation
+from src.ElectricityBill.utils.stage_cache import StageCache
+from src.ElectricityBill.utils.artifact_store import record_artifacts
+from src.ElectricityBill.utils.profiling import profile_stage
 from src.ElectricityBill import logging
 from pathlib import Path
 import os
+import glob
 
 STAGE_NAME = "Data Transformation Stage"
+STAGE_KEY = "data_transformation"
+# Imported only once the stage cache says the stage has to run
+COMPONENT_MODULE = "src.ElectricityBill.components.data_transformation"
 
 class DataTransformationPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, force: bool = False):
+        self.force = force
 
 
-    def main(self):
+    @profile_stage(STAGE_KEY)
+    def main(self, validation_status: bool = None, drift_status: bool = None):
+        """
+        The statuses come from the validation stage when it ran in the same process; otherwise
+        (stage run on its own, or validation reused from the stage cache) they are read from
+        the status files it wrote
+        """
         try:
-            with open(Path("artifacts/data_validation/status.txt"), "r") as f:
-                status = f.read().split(" ")[-1]
+            # Create a ConfigurationManager object
+            config = ConfigurationManager()
+            # The status files are wherever the validation stage is configured to write them
+            data_validation_config = config.get_data_validation_config()
 
+            if validation_status is None:
+                with open(Path(data_validation_config.STATUS_FILE), "r") as f:
+                    validation_status = f.read().split(" ")[-1] == "True"
+
+            # Gate on the drift check the same way, when it has run
+            drift_status_file = data_validation_config.drift_status_file
+            if drift_status is None and drift_status_file and Path(drift_status_file).exists():
+                with open(drift_status_file, "r") as f:
+                    drift_status = f.read().split(" ")[-1] == "True"
+            if validation_status and drift_status is False:
+                raise Exception("Data drift detected against the reference profile, see drift_report.json")
+
+
+            if validation_status:
+                # An incremental training run continues the model of the last full rebuild, whose preprocessor
+                # and train/test split stay frozen until the next rebuild: refitting them here would change the
+                # features under the model and move rows it was trained on into the test split
+                if config.config.model_trainer.get("mode", "full") == "incremental":
+                    from src.ElectricityBill.components.model_trainer import ModelTrainer
+                    if not ModelTrainer(config=config.get_model_trainer_config()).needs_full_rebuild():
+                        logging.info("Incremental training run, keeping the split and preprocessor of the last full rebuild")
+                        return
 
-            if status == "True":
-                 # Create a ConfigurationManager object
-                config = ConfigurationManager()
                 # Get the data transformation configuration
                 data_transformation_config = config.get_data_transformation_config()
-                # Initiate data transformation
-                data_transformation = DataTransformation(config=data_transformation_config)
-                # Perform train-test splitting and store the results
-                self.X_train, self.X_test, self.y_train, self.y_test = data_transformation.train_test_splitting()
 
-                train_path = os.path.join(data_transformation_config.root_dir, "train.csv")
-                test_path = os.path.join(data_transformation_config.root_dir, "test.csv")
+                train_path = os.path.join(data_transformation_config.root_dir, "train.parquet")
+                test_path = os.path.join(data_transformation_config.root_dir, "test.parquet")
 
-                # Initiate data transformation and store the results
-                self.X_train_transformed, self.X_test_transformed, self.y_train, self.y_test = data_transformation.initiate_data_transformation(
-                    train_path, test_path
+                # Skip the stage when the data and the transformation settings are unchanged
+                stage_cache = StageCache(config=config.get_stage_cache_config())
+                fingerprint = stage_cache.fingerprint(
+                    input_files=[data_transformation_config.data_path],
+                    sections={
+                        "data_transformation": config.config.data_transformation,
+                        "schema": config.schema
+                    },
+                    modules=[COMPONENT_MODULE, sys.modules[__name__]]
                 )
+                if stage_cache.is_fresh(STAGE_KEY, fingerprint, force=self.force):
+                    return
+
+                # Initiate data transformation
+                from src.ElectricityBill.components.data_transformation import DataTransformation
+                data_transformation = DataTransformation(config=data_transformation_config)
+                # Split, fit and transform from a single read of the dataset and store the results
+                self.X_train_transformed, self.X_test_transformed, self.y_train, self.y_test = data_transformation.split_and_transform()
+
+                root_dir = data_transformation_config.root_dir
+                # Split files left over from an earlier run with persist_splits are not outputs of this one
+                splits = [train_path, test_path] if data_transformation_config.persist_splits else []
+                stage_cache.record(STAGE_KEY, fingerprint, splits + [
+                    os.path.join(root_dir, "preprocessor_obj.joblib"),
+                    os.path.join(root_dir, "feature_names.json"),
+                    os.path.join(root_dir, "y_train.npy"),
+                    os.path.join(root_dir, "y_test.npy"),
+                    os.path.join(root_dir, "train_rows.npy")
+                ] + glob.glob(os.path.join(root_dir, "train_transformed", "*")) + glob.glob(os.path.join(root_dir, "test_transformed", "*")))
+                # The transformed matrices are rebuilt from the data, only the fitted objects are versioned
+                record_artifacts([os.path.join(root_dir, "preprocessor_obj.joblib"), os.path.join(root_dir, "feature_names.json")])
             else:
                 raise Exception("Your data schema is not valid")
 
         except Exception as e:
-            print(e)
\ No newline at end of file
+            logging.exception(e)
+            raise e
@@ -0,0 +1,87 @@
+import sys
+import os
+import glob
+from src.ElectricityBill.config.configuration import ConfigurationManager
+from src.ElectricityBill.utils.stage_cache import StageCache
+from src.ElectricityBill.utils.artifact_store import record_artifacts
+from src.ElectricityBill.utils.profiling import profile_stage, step
+from src.ElectricityBill import logging, setup_logging
+
+
+STAGE_NAME = "Model Trainer stage"
+STAGE_KEY = "model_trainer"
+# Imported only once the stage cache says the stage has to run
+COMPONENT_MODULE = "src.ElectricityBill.components.model_trainer"
+
+class ModelTrainerPipeline:
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @profile_stage(STAGE_KEY)
+    def main(self):
+        config = ConfigurationManager()
+        model_trainer_config = config.get_model_trainer_config()
+
+        # Skip the stage when the transformed data and the training parameters are unchanged
+        stage_cache = StageCache(config=config.get_stage_cache_config())
+        fingerprint = stage_cache.fingerprint(
+            input_files=sorted(glob.glob(os.path.join(model_trainer_config.train_data_dir, "*"))) + [
+                model_trainer_config.train_target_path,
+                model_trainer_config.feature_names_path,
+                model_trainer_config.train_rows_path,
+                model_trainer_config.data_path
+            ],
+            sections={
+                "model_trainer": config.config.model_trainer,
+                "params": config.params
+            },
+            modules=[COMPONENT_MODULE, sys.modules[__name__]]
+        )
+        if stage_cache.is_fresh(STAGE_KEY, fingerprint, force=self.force):
+            return
+
+        from src.ElectricityBill.components.model_trainer import ModelTrainer
+        model_trainer = ModelTrainer(config=model_trainer_config)
+        outputs = [
+            model_trainer.model_path,
+            model_trainer.preprocessor_path,
+            model_trainer.compiled_preprocessor_path,
+            model_trainer_config.metrics_file,
+            model_trainer_config.state_file,
+            model_trainer_config.preprocessor_state_file,
+            model_trainer_config.seen_rows_file,
+            model_trainer_config.holdout_file
+        ]
+        if model_trainer.needs_full_rebuild():
+            if model_trainer_config.model_type == "sgd":
+                with step("train_linear"):
+                    model_trainer.train_linear()
+            else:
+                params = None
+                if model_trainer_config.search_params.get("enabled", False):
+                    with step("search"):
+                        params = model_trainer.search()
+                    outputs.append(model_trainer_config.best_params_file)
+                with step("train"):
+                    model_trainer.train(params=params)
+            with step("record_full_rebuild"):
+                model_trainer.record_full_rebuild()
+        else:
+            with step("train_incremental"):
+                model_trainer.train_incremental()
+
+        stage_cache.record(STAGE_KEY, fingerprint, outputs)
+        record_artifacts(outputs)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        logging.info(f"++++++++++++++++++++++ {STAGE_NAME} started ++++++++++++++++++++++++++")
+        obj = ModelTrainerPipeline()
+        obj.main()
+        logging.info(f"********************** {STAGE_NAME} completed ****************\n\nx================x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
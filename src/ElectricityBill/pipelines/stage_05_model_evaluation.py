@@ -0,0 +1,60 @@
+import sys
+import os
+import glob
+from src.ElectricityBill.config.configuration import ConfigurationManager
+from src.ElectricityBill.utils.stage_cache import StageCache
+from src.ElectricityBill.utils.artifact_store import record_artifacts
+from src.ElectricityBill.utils.profiling import profile_stage
+from src.ElectricityBill import logging, setup_logging
+
+
+STAGE_NAME = "Model Evaluation stage"
+STAGE_KEY = "model_evaluation"
+# Imported only once the stage cache says the stage has to run
+COMPONENT_MODULE = "src.ElectricityBill.components.model_evaluation"
+
+class ModelEvaluationPipeline:
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @profile_stage(STAGE_KEY)
+    def main(self):
+        config = ConfigurationManager()
+        model_evaluation_config = config.get_model_evaluation_config()
+
+        # Skip the stage when the model and the test data are unchanged
+        stage_cache = StageCache(config=config.get_stage_cache_config())
+        fingerprint = stage_cache.fingerprint(
+            input_files=sorted(glob.glob(os.path.join(model_evaluation_config.test_data_dir, "*"))) + [
+                model_evaluation_config.test_target_path,
+                model_evaluation_config.feature_names_path,
+                model_evaluation_config.model_path,
+                model_evaluation_config.training_state_file,
+                model_evaluation_config.holdout_path,
+                model_evaluation_config.preprocessor_path
+            ],
+            sections={"model_evaluation": config.config.model_evaluation},
+            modules=[COMPONENT_MODULE, sys.modules[__name__]]
+        )
+        if stage_cache.is_fresh(STAGE_KEY, fingerprint, force=self.force):
+            return
+
+        from src.ElectricityBill.components.model_evaluation import ModelEvaluation
+        model_evaluation = ModelEvaluation(config=model_evaluation_config)
+        model_evaluation.evaluate()
+
+        stage_cache.record(STAGE_KEY, fingerprint, [model_evaluation_config.metrics_file])
+        record_artifacts([model_evaluation_config.metrics_file])
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        logging.info(f"++++++++++++++++++++++ {STAGE_NAME} started ++++++++++++++++++++++++++")
+        obj = ModelEvaluationPipeline()
+        obj.main()
+        logging.info(f"********************** {STAGE_NAME} completed ****************\n\nx================x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
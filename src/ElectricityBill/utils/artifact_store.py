@@ -0,0 +1,174 @@
+import os
+import json
+import shutil
+import threading
+from datetime import datetime
+from src.ElectricityBill import logging
+from src.ElectricityBill.entity.config_entity import ArtifactStoreConfig
+from src.ElectricityBill.utils.commons import atomic_path, atomic_write, file_sha256
+from src.ElectricityBill.utils.profiling import run_id
+
+
+# Stages record their artifacts from the pipeline runner's threads into the same run manifest
+_LOCK = threading.Lock()
+_store = None
+
+
+class ArtifactStore:
+    """Content hashes and a version per pipeline run of the artifacts the model is served from.
+
+    Artifacts stay at their configured paths, where the stages and the serving process read
+    them. record() hashes the files a stage wrote, keeps a copy of each new content under
+    objects/<sha256> and adds them to runs/<run id>.json. A run's manifest starts from the
+    previous run's, so every manifest lists the complete set of artifacts of that version and
+    restore() can put any kept version back in place. Identical files are stored once.
+    """
+
+    def __init__(self, config: ArtifactStoreConfig, run: str = None):
+        self.config = config
+        self.run = run or run_id()
+        self.objects_dir = os.path.join(self.config.root_dir, "objects")
+        self.runs_dir = os.path.join(self.config.root_dir, "runs")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+
+    def _manifest_path(self, run: str) -> str:
+        return os.path.join(self.runs_dir, f"{run}.json")
+
+
+    def _object_path(self, sha256: str, path: str) -> str:
+        # Keep the extension, loaders like xgboost's pick the format from it
+        return os.path.join(self.objects_dir, sha256 + os.path.splitext(path)[1])
+
+
+    def runs(self) -> list:
+        """Run ids with a manifest, oldest first"""
+        return sorted(name[:-len(".json")] for name in os.listdir(self.runs_dir) if name.endswith(".json"))
+
+
+    def manifest(self, run: str = None) -> dict:
+        """
+        Manifest of a run, the latest one when run is None.
+        Function returns {} when no run was recorded yet
+        """
+        runs = self.runs()
+        run = run or (runs[-1] if runs else None)
+        if run is None:
+            return {}
+        with open(self._manifest_path(run)) as f:
+            return json.load(f)
+
+
+    def record(self, paths: list) -> dict:
+        """
+        Adds the files at paths to this run's manifest. Files that do not exist are skipped.
+        Function returns path -> sha256 of the recorded files
+        """
+        with _LOCK:
+            if os.path.exists(self._manifest_path(self.run)):
+                manifest = self.manifest(self.run)
+            else:
+                previous = self.manifest()
+                manifest = {
+                    "run_id": self.run,
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "previous_run": previous.get("run_id"),
+                    "artifacts": previous.get("artifacts", {}),
+                }
+
+            recorded = {}
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                key = os.path.normpath(str(path))
+                stat = os.stat(key)
+                entry = manifest["artifacts"].get(key)
+                # Unchanged since the last record, the hash and the stored copy are still valid
+                if not (entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns):
+                    sha256 = file_sha256(key)
+                    object_path = self._object_path(sha256, key)
+                    if not os.path.exists(object_path):
+                        with atomic_path(object_path) as tmp_path:
+                            shutil.copyfile(key, tmp_path)
+                    entry = {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "object": object_path}
+                manifest["artifacts"][key] = entry
+                recorded[key] = entry["sha256"]
+
+            with atomic_write(self._manifest_path(self.run), "w") as f:
+                json.dump(manifest, f, indent=4, sort_keys=True)
+            self.prune()
+        logging.info(f"Artifact store: recorded {len(recorded)} artifact(s) in run {self.run}")
+        return recorded
+
+
+    def verify(self, run: str = None) -> list:
+        """
+        Compares the files on disk with a run's manifest (the latest by default).
+        Function returns the paths that are missing or whose content hash differs
+        """
+        mismatches = []
+        for path, entry in self.manifest(run).get("artifacts", {}).items():
+            if not os.path.exists(path) or file_sha256(path) != entry["sha256"]:
+                mismatches.append(path)
+        return mismatches
+
+
+    def restore(self, run: str, paths: list = None) -> list:
+        """
+        Puts the artifacts of a kept run back at their paths, each replaced atomically so a
+        serving process reloads a complete file. Function returns the restored paths
+        """
+        artifacts = self.manifest(run).get("artifacts", {})
+        if not artifacts:
+            raise ValueError(f"No artifacts recorded for run {run}, known runs: {self.runs()}")
+        selected = [os.path.normpath(str(path)) for path in paths] if paths else list(artifacts)
+        restored = []
+        for path in selected:
+            entry = artifacts.get(path)
+            if entry is None:
+                raise ValueError(f"{path} is not an artifact of run {run}")
+            with atomic_path(path) as tmp_path:
+                shutil.copyfile(entry["object"], tmp_path)
+            restored.append(path)
+        logging.info(f"Artifact store: restored {len(restored)} artifact(s) of run {run}")
+        return restored
+
+
+    def prune(self):
+        """Drops the manifests beyond the keep_runs latest ones and the copies no kept run refers to"""
+        runs = self.runs()
+        for run in runs[:max(0, len(runs) - self.config.keep_runs)]:
+            os.remove(self._manifest_path(run))
+        referenced = {
+            os.path.basename(entry["object"])
+            for run in self.runs()
+            for entry in self.manifest(run).get("artifacts", {}).values()
+        }
+        for name in os.listdir(self.objects_dir):
+            if name not in referenced and ".tmp" not in name:
+                os.remove(os.path.join(self.objects_dir, name))
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Store of this process' run, None when artifact_store.enabled is off"""
+    global _store
+    if _store is None:
+        # Imported here, the configuration module is not needed until a stage runs
+        from src.ElectricityBill.config.configuration import ConfigurationManager
+        config = ConfigurationManager().get_artifact_store_config()
+        if not config.enabled:
+            return None
+        _store = ArtifactStore(config)
+    return _store
+
+
+def record_artifacts(paths: list):
+    """Records the artifacts a stage wrote in this run's manifest, a no-op when the store is disabled"""
+    try:
+        store = get_artifact_store()
+        if store is not None:
+            store.record(paths)
+    except OSError as e:
+        # Versioning must never fail the stage whose artifacts are already written
+        logging.warning(f"Could not record the artifacts {paths}: {e}")
@@ -1,21 +1,54 @@
 import os
+import shutil
 from box.exceptions import BoxValueError
 import sys
-import yaml
+import pickle
+import hashlib
+import threading
+from contextlib import contextmanager
 from src.ElectricityBill import logging
 from src.ElectricityBill.exception import FileOperationError
+from src.ElectricityBill.constants import YAML_CACHE_PATH
 import json
-import joblib
+import numpy as np
 from ensure import ensure_annotations
 from box import ConfigBox
 from pathlib import Path
 from typing import Any
 
 
+# Absolute path -> ((size, mtime_ns), pickled content) of every parsed yaml file
+_yaml_cache = None
+_yaml_cache_lock = threading.Lock()
+
+
+def _load_yaml_cache() -> dict:
+    try:
+        with open(YAML_CACHE_PATH, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, truncated or from an incompatible version: parse the files again
+        return {}
+
+
+def _save_yaml_cache(cache: dict):
+    try:
+        os.makedirs(os.path.dirname(YAML_CACHE_PATH) or ".", exist_ok=True)
+        tmp_path = f"{YAML_CACHE_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, YAML_CACHE_PATH)
+    except OSError as e:
+        logging.warning(f"Could not write the yaml cache {YAML_CACHE_PATH}: {e}")
+
+
 @ensure_annotations
 def read_yaml(path_to_yaml: Path) -> ConfigBox:
     """reads yaml file and returns
 
+    Parsed files are cached in memory and in YAML_CACHE_PATH, keyed on the path, size and
+    modification time, so an unchanged file is only parsed once across runs.
+
     Args:
         path_to_yaml (str): path like input
 
@@ -26,12 +59,28 @@ def read_yaml(path_to_yaml: Path) -> ConfigBox:
     Returns:
         ConfigBox: ConfigBox type
     """
+    global _yaml_cache
     try:
-        with open(path_to_yaml) as yaml_file:
-            content = yaml.safe_load(yaml_file)
+        path = os.path.abspath(path_to_yaml)
+        stat = os.stat(path)
+        stat_key = (stat.st_size, stat.st_mtime_ns)
+        with _yaml_cache_lock:
+            if _yaml_cache is None:
+                _yaml_cache = _load_yaml_cache()
+            cached = _yaml_cache.get(path)
+
+        if cached is not None and cached[0] == stat_key:
+            # A fresh copy per call, callers may modify the box they get
+            content = pickle.loads(cached[1])
+        else:
+            import yaml
+            with open(path) as yaml_file:
+                content = yaml.load(yaml_file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            with _yaml_cache_lock:
+                _yaml_cache[path] = (stat_key, pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL))
+                _save_yaml_cache(_yaml_cache)
             logging.info(f"yaml file: {path_to_yaml} loaded successfully")
-            print(content)
-            return ConfigBox(content)
+        return ConfigBox(content)
     except BoxValueError:
         raise ValueError("yaml file is empty")
     except Exception as e:
@@ -52,16 +101,83 @@ def create_directories(path_to_directories: list, verbose=True):
         if verbose:
             logging.info(f"created directory at: {path}")
 
-def save_object(file_path, obj):
-    
-    # Get the directory path of the file 
-    dir_path = os.path.dirname(file_path)
-    # if the directory path does not exist, create it 
-    os.makedirs(dir_path, exist_ok = True)
+@contextmanager
+def atomic_path(path):
+    """temporary path next to path, moved over it once the block completes
+
+    Readers (the next stage, a serving process reloading the model) see either the
+    previous file or the complete new one, never a half written one. The temporary
+    file is removed when the block raises.
+
+    Args:
+        path (Path): final path of the file
+
+    Yields:
+        str: path to write to
+    """
+    path = str(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Same extension, writers like xgboost's save_model pick the format from it
+    base, extension = os.path.splitext(path)
+    tmp_path = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp{extension}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
-    # save the object in the file 
-    with open(file_path, 'wb') as file_obj:
-        joblib.dump(obj, file_obj)
+@contextmanager
+def atomic_write(path, mode: str = "wb"):
+    """open a file for writing through atomic_path, flushed to disk before it replaces path
+
+    Args:
+        path (Path): final path of the file
+        mode (str, optional): open mode, "w" for text. Defaults to "wb".
+
+    Yields:
+        file object to write to
+    """
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of a file, read chunk_size bytes at a time
+
+    Args:
+        path (Path): file to hash
+        chunk_size (int, optional): bytes read per iteration. Defaults to 1 MB.
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_object(file_path, obj, compress=0):
+    """save an object with joblib, atomically
+
+    Uncompressed files (the default) keep their NumPy arrays as raw aligned buffers that
+    load_bin can memory-map; compression makes the file smaller but always loads into memory.
+
+    Args:
+        file_path (Path): path to the joblib file
+        obj (Any): object to save
+        compress (int | bool, optional): joblib compression level. Defaults to 0.
+    """
+    import joblib
+    with atomic_write(file_path) as file_obj:
+        joblib.dump(obj, file_obj, compress=compress)
 
 
 
@@ -73,7 +189,7 @@ def save_json(path: Path, data: dict):
         path (Path): path to json file
         data (dict): data to be saved in json file
     """
-    with open(path, "w") as f:
+    with atomic_write(path, "w") as f:
         json.dump(data, f, indent=4)
 
     logging.info(f"json file saved at: {path}")
@@ -98,29 +214,35 @@ def load_json(path: Path) -> ConfigBox:
     return ConfigBox(content)
 
 
-@ensure_annotations
-def save_bin(data: Any, path: Path):
-    """save binary file
+# Not checked by ensure_annotations, which cannot check values against typing.Any
+def save_bin(data: Any, path: Path, compress=0):
+    """save binary file atomically
 
     Args:
         data (Any): data to be saved as binary
         path (Path): path to binary file
+        compress (int | bool, optional): joblib compression level, 0 keeps the file mappable. Defaults to 0.
     """
-    joblib.dump(value=data, filename=path)
+    save_object(file_path=path, obj=data, compress=compress)
     logging.info(f"binary file saved at: {path}")
 
 
-@ensure_annotations
-def load_bin(path: Path) -> Any:
+def load_bin(path: Path, mmap_mode=None) -> Any:
     """load binary data
 
+    With mmap_mode="r" the NumPy arrays of an uncompressed file are memory-mapped read-only
+    instead of copied, so processes loading the same file share its pages in the page cache.
+    Compressed files are always loaded into memory.
+
     Args:
         path (Path): path to binary file
+        mmap_mode (str, optional): np.memmap mode for the arrays, None loads into memory. Defaults to None.
 
     Returns:
         Any: object stored in the file
     """
-    data = joblib.load(path)
+    import joblib
+    data = joblib.load(path, mmap_mode=mmap_mode)
     logging.info(f"binary file loaded from: {path}")
     return data
 
@@ -140,5 +262,169 @@ def get_size(path: Path) -> str:
     return f"~ {size_in_kb} KB"
 
 
+def process_pool_context():
+    """multiprocessing context for the process pools of the pipeline stages and the batch scorer
+
+    Stages can run on the pipeline runner's threads. Forking while another thread holds a
+    lock (an import in progress, a log handler) can deadlock the child, so workers are
+    started from a fork server where the platform has one and spawned otherwise.
+
+    Returns:
+        multiprocessing context to pass as mp_context
+    """
+    import multiprocessing
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def get_peak_rss_mb():
+    """peak resident set size of the current process in MB
+
+    Returns:
+        float | None: peak RSS, None where the resource module is unavailable (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+
+def save_matrix(matrix, dir_path) -> list:
+    """save a feature matrix as raw .npy arrays that can be memory-mapped
+
+    Sparse matrices are stored as their CSR data/indices/indptr arrays, dense
+    ones as a single array. A format.json file records the layout.
 
+    Args:
+        matrix (scipy.sparse matrix | np.ndarray): matrix to save
+        dir_path (Path): directory to write the arrays to
+
+    Returns:
+        list: paths of the written files
+    """
+    import scipy.sparse as sp
+    os.makedirs(dir_path, exist_ok=True)
+    if sp.issparse(matrix):
+        matrix = matrix.tocsr()
+        arrays = {"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr}
+        layout = {"format": "csr", "shape": list(matrix.shape)}
+    else:
+        arrays = {"array": np.asarray(matrix)}
+        layout = {"format": "dense", "shape": list(np.shape(matrix))}
+
+    written = []
+    for name, array in arrays.items():
+        file_path = os.path.join(dir_path, f"{name}.npy")
+        with atomic_write(file_path) as f:
+            np.save(f, np.ascontiguousarray(array))
+        written.append(file_path)
+
+    layout_path = os.path.join(dir_path, "format.json")
+    with atomic_write(layout_path, "w") as f:
+        json.dump(layout, f)
+    written.append(layout_path)
+
+    logging.info(f"{layout['format']} matrix of shape {tuple(layout['shape'])} saved at: {dir_path}")
+    return written
+
+
+def load_matrix(dir_path, mmap_mode="r"):
+    """load a feature matrix written by save_matrix
+
+    Args:
+        dir_path (Path): directory holding the arrays
+        mmap_mode (str, optional): np.load mmap_mode, None loads into memory. Defaults to "r".
+
+    Returns:
+        scipy.sparse.csr_matrix | np.ndarray: the matrix, backed by the mapped files
+    """
+    with open(os.path.join(dir_path, "format.json")) as f:
+        layout = json.load(f)
+
+    def load(name):
+        return np.load(os.path.join(dir_path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    if layout["format"] == "csr":
+        import scipy.sparse as sp
+        return sp.csr_matrix((load("data"), load("indices"), load("indptr")), shape=tuple(layout["shape"]), copy=False)
+    return load("array")
+
+
+
+class NpyAppender:
+    """Append rows to a .npy file without holding the whole array in memory
+
+    Rows are appended to a raw temporary file; close() writes the .npy header
+    for the final shape and streams the raw bytes after it.
+    """
 
+    def __init__(self, file_path, dtype, row_shape: tuple = ()):
+        self.file_path = file_path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self.raw_path = f"{file_path}.raw"
+        self.raw_file = open(self.raw_path, "wb")
+
+    def append(self, array):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        array.tofile(self.raw_file)
+        self.rows += len(array)
+
+    def close(self):
+        self.raw_file.close()
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": (self.rows,) + self.row_shape}
+        with atomic_write(self.file_path) as out, open(self.raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, 16 * 1024 * 1024)
+        os.remove(self.raw_path)
+        return self.file_path
+
+
+class MatrixWriter:
+    """Write a feature matrix chunk by chunk in the save_matrix layout"""
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        os.makedirs(dir_path, exist_ok=True)
+        self.appenders = None
+        self.layout = None
+        self.nnz = 0
+
+    def append(self, chunk):
+        import scipy.sparse as sp
+        if self.appenders is None:
+            # The first chunk decides between the sparse and the dense layout
+            if sp.issparse(chunk):
+                self.layout = {"format": "csr", "shape": [0, chunk.shape[1]]}
+                self.appenders = {
+                    "data": NpyAppender(os.path.join(self.dir_path, "data.npy"), chunk.dtype),
+                    "indices": NpyAppender(os.path.join(self.dir_path, "indices.npy"), np.int32 if chunk.shape[1] < 2 ** 31 else np.int64),
+                    "indptr": NpyAppender(os.path.join(self.dir_path, "indptr.npy"), np.int64),
+                }
+                self.appenders["indptr"].append([0])
+            else:
+                self.layout = {"format": "dense", "shape": [0, chunk.shape[1]]}
+                self.appenders = {"array": NpyAppender(os.path.join(self.dir_path, "array.npy"), chunk.dtype, (chunk.shape[1],))}
+
+        if self.layout["format"] == "csr":
+            chunk = sp.csr_matrix(chunk)
+            self.appenders["data"].append(chunk.data)
+            self.appenders["indices"].append(chunk.indices)
+            self.appenders["indptr"].append(chunk.indptr[1:].astype(np.int64) + self.nnz)
+            self.nnz += chunk.nnz
+        else:
+            self.appenders["array"].append(np.asarray(chunk))
+        self.layout["shape"][0] += chunk.shape[0]
+
+    def close(self) -> list:
+        written = [appender.close() for appender in (self.appenders or {}).values()]
+        layout_path = os.path.join(self.dir_path, "format.json")
+        with atomic_write(layout_path, "w") as f:
+            json.dump(self.layout, f)
+        logging.info(f"{self.layout['format']} matrix of shape {tuple(self.layout['shape'])} saved at: {self.dir_path}")
+        return written + [layout_path]
@@ -0,0 +1,183 @@
+import json
+import numpy as np
+from src.ElectricityBill.utils.commons import atomic_write
+
+
+def compile_preprocessor(preprocessor) -> dict:
+    """Flatten a fitted ColumnTransformer into plain lists that NumPy can apply.
+
+    Supports the blocks built by DataTransformation.get_transformer_obj: median imputer +
+    StandardScaler, most frequent imputer + OneHotEncoder(handle_unknown='ignore') and
+    passthrough. Anything else raises ValueError rather than compiling to something different.
+
+    Args:
+        preprocessor: fitted ColumnTransformer
+
+    Returns:
+        dict: JSON-serializable spec for CompiledPreprocessor
+    """
+    input_columns = [str(col) for col in preprocessor.feature_names_in_]
+    blocks = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or len(columns) == 0:
+            continue
+        # The remainder is listed by position
+        columns = [input_columns[col] if isinstance(col, (int, np.integer)) else str(col) for col in columns]
+
+        # Newer sklearn stores fitted passthrough blocks as an identity FunctionTransformer
+        if transformer == "passthrough" or (type(transformer).__name__ == "FunctionTransformer" and transformer.func is None):
+            blocks.append({"kind": "passthrough", "columns": columns})
+            continue
+
+        steps = dict(getattr(transformer, "named_steps", {}))
+        imputer = steps.get("imputer")
+        if "scaler" in steps and imputer is not None and imputer.strategy in ("median", "mean"):
+            scaler = steps["scaler"]
+            n = len(columns)
+            blocks.append({
+                "kind": "numerical",
+                "columns": columns,
+                "fill": np.asarray(imputer.statistics_, dtype="float64").tolist(),
+                "mean": np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(n), dtype="float64").tolist(),
+                "scale": np.asarray(scaler.scale_ if scaler.with_std else np.ones(n), dtype="float64").tolist(),
+            })
+        elif "onehot" in steps and imputer is not None and imputer.strategy == "most_frequent":
+            encoder = steps["onehot"]
+            if encoder.drop_idx_ is not None or getattr(encoder, "infrequent_categories_", None) or encoder.handle_unknown != "ignore":
+                raise ValueError(f"Cannot compile the {name} OneHotEncoder: only drop=None, no infrequent categories and handle_unknown='ignore' are supported")
+            blocks.append({
+                "kind": "onehot",
+                "columns": columns,
+                "fill": [str(value) for value in imputer.statistics_],
+                "categories": [[str(value) for value in values] for values in encoder.categories_],
+            })
+        else:
+            raise ValueError(f"Cannot compile the {name} transformer {transformer}")
+
+    return {
+        "input_columns": input_columns,
+        "blocks": blocks,
+        "feature_names": [str(name) for name in preprocessor.get_feature_names_out()],
+        "sparse_output": bool(getattr(preprocessor, "sparse_output_", False)),
+    }
+
+
+def _is_missing(value) -> bool:
+    # None, NaN and the empty string of a blank form field
+    return value is None or value != value or value == ""
+
+
+class CompiledPreprocessor:
+    """Applies a compiled preprocessor spec with vectorized NumPy, no pandas or sklearn needed"""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.input_columns = spec["input_columns"]
+        self.feature_names = spec["feature_names"]
+        self.n_features = len(self.feature_names)
+        self.sparse_output = spec["sparse_output"]
+        self.blocks = []
+        offset = 0
+        for block in spec["blocks"]:
+            block = dict(block)
+            block["offset"] = offset
+            if block["kind"] == "numerical":
+                block["fill"] = np.asarray(block["fill"])
+                block["mean"] = np.asarray(block["mean"])
+                block["scale"] = np.asarray(block["scale"])
+                offset += len(block["columns"])
+            elif block["kind"] == "onehot":
+                block["index"] = [{value: i for i, value in enumerate(values)} for values in block["categories"]]
+                block["widths"] = [len(values) for values in block["categories"]]
+                offset += sum(block["widths"])
+            else:
+                offset += len(block["columns"])
+            self.blocks.append(block)
+
+
+    @classmethod
+    def load(cls, path) -> "CompiledPreprocessor":
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+    def save(self, path):
+        with atomic_write(path, "w") as f:
+            json.dump(self.spec, f, indent=4)
+
+
+    def _columns(self, records) -> dict:
+        """Column name -> list of values, from a list of dicts or a DataFrame"""
+        if hasattr(records, "columns"):
+            missing = [col for col in self.input_columns if col not in records.columns]
+            if missing:
+                raise ValueError(f"Missing columns: {missing}")
+            return {col: records[col].tolist() for col in self.input_columns}
+        missing = [col for col in self.input_columns if any(col not in record for record in records)]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        return {col: [record[col] for record in records] for col in self.input_columns}
+
+
+    @staticmethod
+    def _numeric(col: str, values: list) -> np.ndarray:
+        try:
+            return np.array([np.nan if _is_missing(value) else value for value in values], dtype="float64")
+        except (TypeError, ValueError):
+            raise ValueError(f"Column {col} must be numeric")
+
+
+    def transform(self, records, zeros_as_missing: bool = False) -> np.ndarray:
+        """
+        Dense equivalent of preprocessor.transform(frame) for a list of dicts or a DataFrame.
+        With zeros_as_missing, zeros become NaN: XGBoost treats the implicit zeros of the sparse
+        matrices it was trained on as missing values, and this reproduces that on dense input.
+        Raises ValueError naming the missing columns or the column that could not be converted
+        """
+        columns = self._columns(records)
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        out = np.zeros((n_rows, self.n_features), dtype="float64")
+        rows = np.arange(n_rows)
+
+        for block in self.blocks:
+            offset = block["offset"]
+            if block["kind"] == "numerical":
+                values = np.column_stack([self._numeric(col, columns[col]) for col in block["columns"]])
+                values = np.where(np.isnan(values), block["fill"], values)
+                out[:, offset:offset + len(block["columns"])] = (values - block["mean"]) / block["scale"]
+            elif block["kind"] == "onehot":
+                for col, fill, index, width in zip(block["columns"], block["fill"], block["index"], block["widths"]):
+                    codes = np.fromiter(
+                        (index.get(fill if _is_missing(value) else str(value), -1) for value in columns[col]),
+                        dtype="int64", count=n_rows
+                    )
+                    # Unknown categories encode as all zeros, like handle_unknown='ignore'
+                    known = codes >= 0
+                    out[rows[known], offset + codes[known]] = 1.0
+                    offset += width
+            else:
+                for i, col in enumerate(block["columns"]):
+                    out[:, offset + i] = self._numeric(col, columns[col])
+
+        if zeros_as_missing:
+            out[out == 0] = np.nan
+        return out
+
+
+    def verify(self, preprocessor, frame, atol: float = 1e-9) -> float:
+        """
+        Checks the compiled transform against preprocessor.transform on frame.
+        Function returns the largest absolute difference and raises ValueError above atol
+        """
+        expected = preprocessor.transform(frame)
+        expected = expected.toarray() if hasattr(expected, "toarray") else np.asarray(expected, dtype="float64")
+        actual = self.transform(frame)
+        if expected.shape != actual.shape:
+            raise ValueError(f"Compiled preprocessor output shape {actual.shape} does not match {expected.shape}")
+        both_nan = np.isnan(expected) & np.isnan(actual)
+        if np.any(np.isnan(expected) != np.isnan(actual)):
+            raise ValueError("Compiled preprocessor output has missing values in different places")
+        max_diff = float(np.max(np.abs(np.where(both_nan, 0, expected - actual)), initial=0.0))
+        if max_diff > atol:
+            raise ValueError(f"Compiled preprocessor differs from transform() by {max_diff}")
+        return max_diff
@@ -0,0 +1,150 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.ElectricityBill import logging
+from src.ElectricityBill.entity.config_entity import PipelineStageConfig
+
+
+def is_artifact(name: str) -> bool:
+    """Inputs and outputs with a path separator are files, the others are values passed in memory"""
+    return "/" in name or "\\" in name
+
+
+class DagRunner:
+    """Runs pipeline stages as a DAG built from their declared inputs and outputs.
+
+    A stage depends on every stage that produces one of its inputs. Stages whose dependencies
+    are done run concurrently on a thread pool of max_workers. The in-memory outputs a stage
+    returns (a dict) are passed to the stages that list them as inputs, as keyword arguments.
+    When a stage fails, the stages depending on it are skipped, the others still run.
+    """
+
+    def __init__(self, stages: list, runners: dict, max_workers: int = 2):
+        """
+        Args:
+            stages (list): PipelineStageConfig in declaration order
+            runners (dict): stage name -> callable taking the in-memory inputs as keyword arguments
+            max_workers (int): stages run at the same time
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.runners = runners
+        self.max_workers = max_workers
+        unknown = [name for name in self.stages if name not in runners]
+        if unknown:
+            raise ValueError(f"No runner for the stages {unknown}")
+        self.dependencies = self._dependencies()
+        self.order = self._topological_order()
+
+
+    def _dependencies(self) -> dict:
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"{output} is produced by both {producers[output]} and {stage.name}")
+                producers[output] = stage.name
+        # Inputs nobody produces are external files, e.g. the source data
+        return {
+            stage.name: {producers[name] for name in stage.inputs if name in producers and producers[name] != stage.name}
+            for stage in self.stages.values()
+        }
+
+
+    def _topological_order(self) -> list:
+        order, done = [], set()
+        pending = list(self.stages)
+        while pending:
+            ready = [name for name in pending if self.dependencies[name] <= done]
+            if not ready:
+                raise ValueError(f"The pipeline stages {pending} have a dependency cycle")
+            order += ready
+            done.update(ready)
+            pending = [name for name in pending if name not in done]
+        return order
+
+
+    def _closure(self, name: str, edges: dict) -> set:
+        seen, stack = {name}, [name]
+        while stack:
+            for other in edges[stack.pop()]:
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+
+    def select(self, from_stage: str = None, to_stage: str = None) -> list:
+        """
+        Stages from from_stage and everything downstream of it, up to to_stage and everything
+        it depends on, in topological order. Function returns all stages when both are None
+        """
+        for name in (from_stage, to_stage):
+            if name is not None and name not in self.stages:
+                raise ValueError(f"Unknown stage {name}, expected one of {self.order}")
+        selected = set(self.stages)
+        if from_stage is not None:
+            dependents = {name: {other for other, deps in self.dependencies.items() if name in deps} for name in self.stages}
+            selected &= self._closure(from_stage, dependents)
+        if to_stage is not None:
+            selected &= self._closure(to_stage, self.dependencies)
+        if not selected:
+            raise ValueError(f"No stage runs from {from_stage} to {to_stage}")
+        return [name for name in self.order if name in selected]
+
+
+    def run(self, selected: list = None) -> dict:
+        """
+        Runs the selected stages (all by default). Dependencies outside the selection are taken
+        as already done, their outputs are then read from disk by the stages themselves.
+        Function returns the in-memory results by name and raises the first stage error
+        """
+        selected = list(selected or self.order)
+        results, done, failed, skipped, errors = {}, set(), set(), set(), []
+        pending = list(selected)
+        running = {}
+
+        def ready(name):
+            deps = self.dependencies[name] & set(selected)
+            return deps <= done
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                for name in list(pending):
+                    if self.dependencies[name] & (failed | skipped):
+                        pending.remove(name)
+                        skipped.add(name)
+                        logging.warning(f"Skipping stage {name}, a stage it depends on did not complete")
+                    elif ready(name):
+                        pending.remove(name)
+                        inputs = {key: results[key] for key in self.stages[name].inputs if not is_artifact(key) and key in results}
+                        running[executor.submit(self._run_stage, name, inputs)] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        failed.add(name)
+                        errors.append(e)
+                        continue
+                    done.add(name)
+                    for key, value in (output or {}).items():
+                        if key in self.stages[name].outputs:
+                            results[key] = value
+
+        if errors:
+            raise errors[0]
+        return results
+
+
+    def _run_stage(self, name: str, inputs: dict):
+        logging.info(f"++++++++++++++++++++++ stage {name} started ++++++++++++++++++++++++++")
+        start = time.perf_counter()
+        try:
+            output = self.runners[name](**inputs)
+        except Exception as e:
+            logging.exception(f"Stage {name} failed: {e}")
+            raise e
+        logging.info(f"*************** stage {name} completed in {time.perf_counter() - start:.2f}s ****************")
+        return output
@@ -0,0 +1,91 @@
+import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# Rough per-entry cost of the OrderedDict node and the (value, expires_at, size) tuple
+ENTRY_OVERHEAD_BYTES = 160
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions with a time to live.
+
+    Keys are digests of canonicalized feature tuples (see make_key). The cache is bounded
+    both by entry count and by an estimate of its memory use; the least recently used
+    entries are evicted first and expired entries are dropped when they are looked up.
+    """
+
+    def __init__(self, max_entries: int = 100000, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+
+
+    @staticmethod
+    def make_key(values: tuple) -> bytes:
+        """Digest of a canonical feature tuple (floats for numbers, str for categories, None for missing)"""
+        return hashlib.blake2b(repr(values).encode(), digest_size=16).digest()
+
+
+    def get(self, key: bytes):
+        """Cached value or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and time.monotonic() > expires_at:
+                del self.entries[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def put(self, key: bytes, value):
+        size = sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self.entries[key] = (value, expires_at, size)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+
+    def clear(self):
+        """Drop every entry, e.g. when a new model or preprocessor is loaded"""
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,280 @@
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from src.ElectricityBill import logging
+from src.ElectricityBill.entity.config_entity import ProfilingConfig
+from src.ElectricityBill.utils.commons import get_peak_rss_mb
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Innermost open stage or step of the current thread/context, steps nest under it
+_current = contextvars.ContextVar("profiling_current", default=None)
+_config = None
+_run_id = None
+# Stages being profiled right now -> names of the stages that ran at the same time as them
+_active = {}
+_active_lock = threading.Lock()
+
+
+def run_id() -> str:
+    """Id shared by every stage profiled in this process, e.g. one main.py run"""
+    global _run_id
+    if _run_id is None:
+        _run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    return _run_id
+
+
+def get_profiling_config() -> ProfilingConfig:
+    global _config
+    if _config is None:
+        # Imported here, the configuration module is not needed until a stage runs
+        from src.ElectricityBill.config.configuration import ConfigurationManager
+        _config = ConfigurationManager().get_profiling_config()
+    return _config
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes, None where neither psutil nor /proc exist"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def io_bytes() -> tuple:
+    """
+    Bytes read and written by this process so far, including page cache hits (rchar/wchar).
+    Function returns (None, None) where neither psutil nor /proc report them
+    """
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+            return getattr(counters, "read_chars", counters.read_bytes), getattr(counters, "write_chars", counters.write_bytes)
+        except (AttributeError, psutil.Error):
+            pass
+    return None, None
+
+
+def _delta(end, start):
+    return None if end is None or start is None else end - start
+
+
+class Span:
+    """Wall/CPU time, peak RSS, IO bytes and rows of one stage or step"""
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        self.rows = rows
+        self.steps = []
+        self.peak_rss = None
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.start_children_cpu = sum(os.times()[2:4])
+        self.start_rss = current_rss()
+        self.start_read, self.start_write = io_bytes()
+        self.sample()
+
+
+    def sample(self, rss: int = None):
+        rss = current_rss() if rss is None else rss
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+
+    def add_rows(self, n: int):
+        self.rows = (self.rows or 0) + int(n)
+
+
+    def finish(self) -> dict:
+        self.sample()
+        read, write = io_bytes()
+        return {
+            "name": self.name,
+            "wall_seconds": round(time.perf_counter() - self.start_wall, 4),
+            "cpu_seconds": round(time.process_time() - self.start_cpu, 4),
+            # CPU of worker processes, counted once they have exited
+            "children_cpu_seconds": round(sum(os.times()[2:4]) - self.start_children_cpu, 4),
+            "start_rss_bytes": self.start_rss,
+            "peak_rss_bytes": self.peak_rss,
+            "read_bytes": _delta(read, self.start_read),
+            "write_bytes": _delta(write, self.start_write),
+            "rows": self.rows,
+            "steps": self.steps,
+        }
+
+
+class RssSampler:
+    """Background thread that samples RSS into every open span, to catch peaks between steps"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.spans = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self.thread.start()
+
+
+    def add(self, span: Span):
+        with self.lock:
+            self.spans.add(span)
+
+
+    def remove(self, span: Span):
+        with self.lock:
+            self.spans.discard(span)
+
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            rss = current_rss()
+            with self.lock:
+                for span in self.spans:
+                    span.sample(rss)
+
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+
+@contextmanager
+def step(name: str, rows: int = None):
+    """
+    Profiles a sub-step of the running stage, e.g. `with step("fit_transform", rows=len(X_train)):`.
+    Steps nest; outside of a profiled stage this does nothing. Yields the span, whose
+    add_rows() can count rows once they are known
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    span, sampler = Span(name, rows), parent[1]
+    token = _current.set((span, sampler))
+    if sampler is not None:
+        sampler.add(span)
+    try:
+        yield span
+    finally:
+        if sampler is not None:
+            sampler.remove(span)
+        _current.reset(token)
+        parent[0].steps.append(span.finish())
+
+
+def add_rows(n: int):
+    """Adds n rows to the innermost open stage or step"""
+    current = _current.get()
+    if current is not None:
+        current[0].add_rows(n)
+
+
+def _enter_stage(span: Span):
+    with _active_lock:
+        for overlapping in _active.values():
+            overlapping.add(span.name)
+        _active[span] = {other.name for other in _active}
+
+
+def _exit_stage(span: Span) -> list:
+    with _active_lock:
+        return sorted(_active.pop(span))
+
+
+def profile_stage(stage: str):
+    """
+    Decorator for a *Pipeline.main that appends the stage's resource use to the run's
+    JSONL file under profiling.root_dir, and dumps a cProfile of it when profiling.cprofile is set.
+    CPU time, RSS and IO bytes are process wide: when stages ran at the same time on the pipeline
+    runner's threads, their records list each other in concurrent_stages and have
+    shared_process_metrics set, the numbers then include the other stages' use
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            config = get_profiling_config()
+            if not config.enabled:
+                return func(*args, **kwargs)
+
+            sampler = RssSampler(config.rss_sample_interval) if config.rss_sample_interval else None
+            span = Span(stage)
+            _enter_stage(span)
+            if sampler is not None:
+                sampler.add(span)
+            token = _current.set((span, sampler))
+            profiler = cProfile.Profile() if config.cprofile else None
+            status = "ok"
+            started_at = datetime.now().isoformat(timespec="seconds")
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                return func(*args, **kwargs)
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                _current.reset(token)
+                if sampler is not None:
+                    sampler.stop()
+                concurrent_stages = _exit_stage(span)
+                record = {"run_id": run_id(), "stage": stage, "started_at": started_at, "status": status}
+                record.update(span.finish())
+                record["concurrent_stages"] = concurrent_stages
+                record["shared_process_metrics"] = bool(concurrent_stages)
+                record["process_peak_rss_mb"] = get_peak_rss_mb()
+                record["cprofile"] = _dump_profile(profiler, config, stage) if profiler is not None else None
+                _write_record(config, record)
+        return wrapper
+    return decorator
+
+
+def _dump_profile(profiler: cProfile.Profile, config: ProfilingConfig, stage: str) -> str:
+    """Writes <stage>.prof for pstats/snakeviz and the top functions by cumulative time as text"""
+    run_dir = os.path.join(config.root_dir, run_id())
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, f"{stage}.prof")
+    profiler.dump_stats(path)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(config.cprofile_top)
+    with open(os.path.join(run_dir, f"{stage}_top.txt"), "w") as f:
+        f.write(text.getvalue())
+    return path
+
+
+def _write_record(config: ProfilingConfig, record: dict):
+    try:
+        os.makedirs(config.root_dir, exist_ok=True)
+        path = os.path.join(config.root_dir, f"run_{run_id()}.jsonl")
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        shared = f" (shared with {', '.join(record['concurrent_stages'])})" if record["shared_process_metrics"] else ""
+        logging.info(
+            f"Stage {record['stage']}: {record['wall_seconds']}s wall, {record['cpu_seconds']}s CPU, "
+            f"peak RSS {(record['peak_rss_bytes'] or 0) / 2 ** 20:.1f} MB{shared}, profile in {path}"
+        )
+    except OSError as e:
+        # Profiling must never fail the stage it measures
+        logging.warning(f"Could not write the stage profile: {e}")
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+
+class NumericSketch:
+    """Mergeable summary of a numeric column.
+
+    Keeps count, nulls, min, max and Welford/Chan moments exactly, plus a bounded
+    weighted quantile sketch of at most max_centroids (value, weight) pairs. Columns
+    with few distinct values (appliance counts, Month) stay exact.
+    """
+
+    def __init__(self, max_centroids: int = 256):
+        self.max_centroids = max_centroids
+        self.count = 0
+        self.null_count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.values = np.empty(0, dtype="float64")
+        self.weights = np.empty(0, dtype="float64")
+
+
+    def update(self, values) -> "NumericSketch":
+        """Add a chunk of values (NaN counts as null)"""
+        values = np.asarray(values, dtype="float64")
+        valid = values[~np.isnan(values)]
+        chunk = NumericSketch(self.max_centroids)
+        chunk.null_count = len(values) - len(valid)
+        if len(valid):
+            chunk.count = len(valid)
+            chunk.min = float(valid.min())
+            chunk.max = float(valid.max())
+            chunk.mean = float(valid.mean())
+            chunk.m2 = float(((valid - chunk.mean) ** 2).sum())
+            unique, counts = np.unique(valid, return_counts=True)
+            chunk.values, chunk.weights = unique, counts.astype("float64")
+            chunk._compress()
+        return self.merge(chunk)
+
+
+    def merge(self, other: "NumericSketch") -> "NumericSketch":
+        """Merge another sketch into this one (Chan et al. for the moments)"""
+        self.null_count += other.null_count
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+        else:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+            self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        values = np.concatenate([self.values, other.values])
+        weights = np.concatenate([self.weights, other.weights])
+        self.values, inverse = np.unique(values, return_inverse=True)
+        self.weights = np.bincount(inverse, weights=weights)
+        self._compress()
+        return self
+
+
+    def _compress(self):
+        """Collapse sorted centroids into max_centroids buckets of equal weight"""
+        if len(self.values) <= self.max_centroids:
+            return
+        cum_before = np.cumsum(self.weights) - self.weights
+        buckets = np.minimum((cum_before / self.weights.sum() * self.max_centroids).astype("int64"), self.max_centroids - 1)
+        weights = np.bincount(buckets, weights=self.weights)
+        values = np.bincount(buckets, weights=self.values * self.weights)
+        keep = weights > 0
+        self.values = values[keep] / weights[keep]
+        self.weights = weights[keep]
+
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, as used by StandardScaler)"""
+        return self.m2 / self.count if self.count else float("nan")
+
+
+    def quantile(self, q):
+        """Quantile(s) with numpy's default linear interpolation between ranks"""
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float("nan")
+        cum_after = np.cumsum(self.weights)
+        ranks = np.asarray(q, dtype="float64") * (cum_after[-1] - 1)
+        lower = np.floor(ranks)
+        upper = np.minimum(lower + 1, cum_after[-1] - 1)
+        v_lower = self.values[np.searchsorted(cum_after, lower, side="right")]
+        v_upper = self.values[np.searchsorted(cum_after, upper, side="right")]
+        result = v_lower + (ranks - lower) * (v_upper - v_lower)
+        return float(result) if np.ndim(result) == 0 else result
+
+
+    def to_dict(self, quantiles=(0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)) -> dict:
+        return {
+            "count": int(self.count),
+            "null_count": int(self.null_count),
+            "min": float(self.min) if self.count else None,
+            "max": float(self.max) if self.count else None,
+            "mean": float(self.mean) if self.count else None,
+            "std": float(np.sqrt(self.variance)) if self.count else None,
+            "quantiles": {str(q): float(v) for q, v in zip(quantiles, np.atleast_1d(self.quantile(list(quantiles))))} if self.count else {},
+        }
+
+
+class CategoricalSketch:
+    """Mergeable count table of a categorical column"""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64")
+        self.null_count = 0
+
+
+    def update(self, values) -> "CategoricalSketch":
+        """Add a chunk of values (None/NaN counts as null)"""
+        values = pd.Series(values)
+        chunk = CategoricalSketch()
+        chunk.null_count = int(values.isna().sum())
+        counts = values.value_counts(dropna=True)
+        chunk.counts = counts[counts > 0].astype("int64")
+        chunk.counts.index = chunk.counts.index.astype(str)
+        return self.merge(chunk)
+
+
+    def merge(self, other: "CategoricalSketch") -> "CategoricalSketch":
+        self.null_count += other.null_count
+        self.counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+        return self
+
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+
+    @property
+    def cardinality(self) -> int:
+        return len(self.counts)
+
+
+    def categories(self) -> list:
+        """Sorted vocabulary"""
+        return sorted(self.counts.index)
+
+
+    def most_frequent(self):
+        """Most frequent value, the smallest one on ties (same rule as SimpleImputer)"""
+        if not len(self.counts):
+            return None
+        top = self.counts[self.counts == self.counts.max()]
+        return sorted(top.index)[0]
+
+
+    def top_k(self, k: int = 10) -> dict:
+        top = self.counts.sort_values(ascending=False, kind="mergesort").head(k)
+        return {str(value): int(count) for value, count in top.items()}
+
+
+    def to_dict(self, k: int = 10) -> dict:
+        return {
+            "count": self.count,
+            "null_count": int(self.null_count),
+            "cardinality": self.cardinality,
+            "top_k": self.top_k(k),
+        }
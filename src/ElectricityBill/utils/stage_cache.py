@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+import inspect
+import importlib.util
+import threading
+from pathlib import Path
+from src.ElectricityBill import logging
+from src.ElectricityBill.entity.config_entity import StageCacheConfig
+
+
+# Stages may run concurrently on the pipeline runner's threads and share the hash index
+_INDEX_LOCK = threading.Lock()
+
+
+class StageCache:
+    """Content-addressed cache of pipeline stage runs.
+
+    A stage is fingerprinted from its input files, the config/params/schema
+    sections it reads and the source of the modules that implement it. When
+    the fingerprint matches the last recorded run and the recorded outputs are
+    still on disk untouched, the stage can be skipped.
+    """
+
+    def __init__(self, config: StageCacheConfig):
+        self.config = config
+        os.makedirs(self.config.root_dir, exist_ok=True)
+        self.hash_index_path = os.path.join(self.config.root_dir, "file_hashes.json")
+        self.hash_index = self._read_json(self.hash_index_path)
+
+
+    @staticmethod
+    def _read_json(path) -> dict:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    @staticmethod
+    def _write_json(path, data: dict):
+        # Write to a temporary file first so a killed run never leaves a half written record
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+    @staticmethod
+    def _stat_key(path) -> list:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+
+    def hash_file(self, path, chunk_size: int = 1024 * 1024) -> str:
+        """sha256 of a file, reusing the previous hash while size and mtime are unchanged
+
+        Args:
+            path (Path): file to hash
+            chunk_size (int): bytes read per iteration
+
+        Returns:
+            str: hex digest
+        """
+        path = os.path.abspath(path)
+        stat_key = self._stat_key(path)
+        cached = self.hash_index.get(path)
+        if cached and cached["stat"] == stat_key:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+
+        with _INDEX_LOCK:
+            # Merge with the entries other stages recorded since this one was created
+            self.hash_index = {**self._read_json(self.hash_index_path), **self.hash_index}
+            self.hash_index[path] = {"stat": stat_key, "sha256": digest.hexdigest()}
+            self._write_json(self.hash_index_path, self.hash_index)
+        return digest.hexdigest()
+
+
+    def fingerprint(self, input_files: list, sections: dict, modules: list) -> str:
+        """Fingerprint of everything a stage depends on
+
+        Args:
+            input_files (list): data files read by the stage
+            sections (dict): config/params/schema sections read by the stage
+            modules (list): modules implementing the stage (their source is the code version), as
+                module objects or dotted names; names are resolved without importing the module
+
+        Returns:
+            str: hex digest
+        """
+        payload = {
+            "inputs": {
+                str(path): self.hash_file(path) if os.path.exists(path) else None
+                for path in input_files if path is not None
+            },
+            "sections": {
+                name: section.to_dict() if hasattr(section, "to_dict") else section
+                for name, section in sections.items()
+            },
+            "code": {
+                self._module_name(module): hashlib.sha256(self._module_source(module).read_bytes()).hexdigest()
+                for module in modules
+            },
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+
+    @staticmethod
+    def _module_name(module) -> str:
+        return module if isinstance(module, str) else module.__name__
+
+
+    @staticmethod
+    def _module_source(module) -> Path:
+        if isinstance(module, str):
+            return Path(importlib.util.find_spec(module).origin)
+        return Path(inspect.getsourcefile(module))
+
+
+    def _record_path(self, stage: str) -> str:
+        return os.path.join(self.config.root_dir, f"{stage}.json")
+
+
+    def is_fresh(self, stage: str, fingerprint: str, force: bool = False) -> bool:
+        """True when the stage can be skipped and its recorded artifacts reused
+
+        Args:
+            stage (str): stage key, e.g. data_validation
+            fingerprint (str): fingerprint of the current inputs
+            force (bool): force a rerun of this stage
+        """
+        if force or stage in self.config.force_rerun or "all" in self.config.force_rerun:
+            logging.info(f"Stage cache: forced rerun of {stage}")
+            return False
+
+        record = self._read_json(self._record_path(stage))
+        if record.get("fingerprint") != fingerprint:
+            logging.info(f"Stage cache: {stage} inputs changed, running stage")
+            return False
+
+        for path, stat_key in record.get("outputs", {}).items():
+            if not os.path.exists(path) or self._stat_key(path) != stat_key:
+                logging.info(f"Stage cache: {stage} output {path} missing or modified, running stage")
+                return False
+
+        logging.info(f"Stage cache: {stage} is up to date, reusing artifacts")
+        return True
+
+
+    def record(self, stage: str, fingerprint: str, output_files: list):
+        """Record a successful stage run
+
+        Args:
+            stage (str): stage key
+            fingerprint (str): fingerprint the stage ran with
+            output_files (list): artifacts written by the stage
+        """
+        outputs = {
+            os.path.abspath(path): self._stat_key(path)
+            for path in output_files
+            if os.path.exists(path)
+        }
+        self._write_json(self._record_path(stage), {"fingerprint": fingerprint, "outputs": outputs})
+        logging.info(f"Stage cache: recorded {stage} run")
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+from src.ElectricityBill.components.data_transformation import DataTransformation
+from src.ElectricityBill.entity.config_entity import DataTransformationConfig
+from src.ElectricityBill.utils.compiled_preprocessor import CompiledPreprocessor, compile_preprocessor
+
+
+NUMERICAL_COLS = ["Fan", "TariffRate"]
+CATEGORICAL_COLS = ["City", "Company"]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "Fan": rng.integers(0, 20, size=300).astype("float64"),
+        "TariffRate": rng.normal(8, 1, size=300),
+        "City": rng.choice(["Pune", "Surat", "Delhi"], size=300).astype(object),
+        "Company": rng.choice(["Tata Power", "Torrent"], size=300).astype(object),
+    })
+    frame.loc[::17, "Fan"] = np.nan
+    frame.loc[::23, "City"] = None
+    return frame
+
+
+@pytest.fixture
+def preprocessor(tmp_path, frame):
+    config = DataTransformationConfig(
+        root_dir=tmp_path,
+        data_path=tmp_path / "data.parquet",
+        numerical_cols=NUMERICAL_COLS,
+        categorical_cols=CATEGORICAL_COLS,
+        columns=NUMERICAL_COLS + CATEGORICAL_COLS,
+        target_column="ElectricityBill",
+    )
+    return DataTransformation(config).get_transformer_obj().fit(frame)
+
+
+def probe_frame(frame):
+    edge_cases = pd.DataFrame([
+        {"Fan": None, "TariffRate": None, "City": None, "Company": None},
+        {"Fan": 3.0, "TariffRate": 7.5, "City": "Mumbai", "Company": "Unknown Power"},
+    ]).astype({"Fan": "float64", "TariffRate": "float64", "City": object, "Company": object})
+    return pd.concat([frame, edge_cases], ignore_index=True)
+
+
+def test_verify_agrees_with_transform_on_nulls_and_unseen_categories(preprocessor, frame):
+    compiled = CompiledPreprocessor(compile_preprocessor(preprocessor))
+    probe = probe_frame(frame)
+
+    assert compiled.verify(preprocessor, probe) <= 1e-9
+    assert compiled.feature_names == preprocessor.get_feature_names_out().tolist()
+    # The unseen City and Company encode as all zeros, the all-missing row as the imputed modes
+    city_and_company = [i for i, name in enumerate(compiled.feature_names) if name.startswith("categorical__")]
+    assert compiled.transform(probe.tail(1))[0, city_and_company].sum() == 0
+
+
+def test_records_and_frames_transform_the_same(preprocessor, frame):
+    compiled = CompiledPreprocessor(compile_preprocessor(preprocessor))
+    probe = probe_frame(frame)
+    records = [{key: (None if value != value else value) for key, value in row.items()} for row in probe.to_dict("records")]
+
+    np.testing.assert_array_equal(compiled.transform(records), compiled.transform(probe))
+
+
+def test_verify_raises_when_the_compiled_form_drifts(preprocessor, frame):
+    spec = compile_preprocessor(preprocessor)
+    spec["blocks"][0]["mean"] = [value + 1.0 for value in spec["blocks"][0]["mean"]]
+
+    with pytest.raises(ValueError, match="differs from transform"):
+        CompiledPreprocessor(spec).verify(preprocessor, probe_frame(frame))
+
+
+def test_save_and_load_round_trip(preprocessor, frame, tmp_path):
+    path = tmp_path / "compiled.json"
+    CompiledPreprocessor(compile_preprocessor(preprocessor)).save(path)
+
+    assert CompiledPreprocessor.load(path).verify(preprocessor, probe_frame(frame)) <= 1e-9
+
+
+def test_unsupported_encoder_is_not_compiled(frame):
+    preprocessor = ColumnTransformer([("categorical", OneHotEncoder(drop="first"), ["Company"])]).fit(frame)
+
+    with pytest.raises(ValueError, match="Cannot compile"):
+        compile_preprocessor(preprocessor)
@@ -0,0 +1,78 @@
+import threading
+import pytest
+from src.ElectricityBill.entity.config_entity import PipelineStageConfig
+from src.ElectricityBill.utils.dag import DagRunner
+
+
+def stage(name, inputs=(), outputs=()):
+    return PipelineStageConfig(name=name, inputs=list(inputs), outputs=list(outputs))
+
+
+STAGES = [
+    stage("ingest", [], ["data/raw.parquet"]),
+    stage("validate", ["data/raw.parquet"], ["status"]),
+    stage("profile", ["data/raw.parquet"], ["data/profile.json"]),
+    stage("transform", ["data/raw.parquet", "status"], ["data/features"]),
+    stage("train", ["data/features"], ["data/model.json"]),
+]
+
+
+def recording_runners(log, fail=(), results=None):
+    lock = threading.Lock()
+
+    def make(name):
+        def run(**inputs):
+            with lock:
+                log.append((name, inputs))
+            if name in fail:
+                raise RuntimeError(f"{name} failed")
+            return (results or {}).get(name)
+        return run
+
+    return {item.name: make(item.name) for item in STAGES}
+
+
+def test_stages_run_after_their_dependencies_and_receive_values():
+    log = []
+    runner = DagRunner(STAGES, recording_runners(log, results={"validate": {"status": True}}), max_workers=2)
+
+    results = runner.run()
+
+    order = [name for name, _ in log]
+    assert sorted(order) == sorted(item.name for item in STAGES)
+    for before, after in [("ingest", "validate"), ("ingest", "profile"), ("validate", "transform"), ("transform", "train")]:
+        assert order.index(before) < order.index(after)
+    # In-memory outputs are passed as keyword arguments, artifact paths are not
+    assert dict(log)["transform"] == {"status": True}
+    assert results == {"status": True}
+
+
+def test_failure_skips_dependents_and_is_raised():
+    log = []
+    runner = DagRunner(STAGES, recording_runners(log, fail={"validate"}), max_workers=2)
+
+    with pytest.raises(RuntimeError, match="validate failed"):
+        runner.run()
+
+    ran = {name for name, _ in log}
+    # profile does not depend on validate and still runs
+    assert ran == {"ingest", "validate", "profile"}
+
+
+def test_select_takes_the_range_and_its_dependencies():
+    runner = DagRunner(STAGES, recording_runners([]))
+
+    assert runner.select(from_stage="transform") == ["transform", "train"]
+    assert runner.select(to_stage="transform") == ["ingest", "validate", "transform"]
+    assert runner.select(from_stage="validate", to_stage="train") == ["validate", "transform", "train"]
+    with pytest.raises(ValueError, match="Unknown stage"):
+        runner.select(from_stage="deploy")
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="dependency cycle"):
+        DagRunner([stage("a", ["b_out"], ["a_out"]), stage("b", ["a_out"], ["b_out"])], {"a": None, "b": None})
+    with pytest.raises(ValueError, match="produced by both"):
+        DagRunner([stage("a", [], ["x"]), stage("b", [], ["x"])], {"a": None, "b": None})
+    with pytest.raises(ValueError, match="No runner"):
+        DagRunner([stage("a")], {})
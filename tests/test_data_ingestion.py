@@ -0,0 +1,120 @@
+import os
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import pyarrow.parquet as pq
+from src.ElectricityBill.components.data_ingestion import DataIngestion
+from src.ElectricityBill.entity.config_entity import DataIngestionConfig
+
+
+PAYLOAD = os.urandom(256 * 1024)
+CUT_AT = 100 * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support, the first full download is cut off after CUT_AT bytes"""
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header[len("bytes="):].split("-")[0])
+            body = PAYLOAD[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if not range_header and self.server.interrupt:
+            # Drop the connection half way, as a network failure would
+            self.server.interrupt = False
+            self.wfile.write(body[:CUT_AT])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.ranges = []
+    httpd.interrupt = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_ingestion(server, tmp_path, expected_sha256):
+    config = DataIngestionConfig(
+        root_dir=tmp_path,
+        source_URL=f"http://127.0.0.1:{server.server_address[1]}/data.zip",
+        local_data_file=tmp_path / "data.zip",
+        unzip_dir=tmp_path,
+        expected_sha256=expected_sha256,
+        chunk_size=16 * 1024,
+        timeout=5,
+        max_retries=3,
+        backoff_seconds=0,
+    )
+    return DataIngestion(config)
+
+
+def test_download_resumes_with_range_after_interruption(server, tmp_path):
+    ingestion = make_ingestion(server, tmp_path, hashlib.sha256(PAYLOAD).hexdigest())
+
+    ingestion.download_file()
+
+    assert server.ranges == [None, f"bytes={CUT_AT}-"]
+    assert (tmp_path / "data.zip").read_bytes() == PAYLOAD
+    assert not (tmp_path / "data.zip.part").exists()
+
+
+def test_download_rejects_checksum_mismatch(server, tmp_path):
+    server.interrupt = False
+    ingestion = make_ingestion(server, tmp_path, "0" * 64)
+
+    with pytest.raises(ValueError, match="checksum"):
+        ingestion.download_file()
+
+    assert not (tmp_path / "data.zip").exists()
+    assert not (tmp_path / "data.zip.part").exists()
+
+
+SCHEMA = {"Fan": "int64", "TariffRate": "float64", "City": "object", "Company": "object"}
+
+
+def make_converter(tmp_path, csv_text):
+    csv_file = tmp_path / "data.csv"
+    csv_file.write_text(csv_text)
+    config = DataIngestionConfig(
+        root_dir=tmp_path,
+        source_URL="",
+        local_data_file=tmp_path / "data.zip",
+        unzip_dir=tmp_path,
+        csv_file=csv_file,
+        parquet_file=tmp_path / "data.parquet",
+        all_schema=SCHEMA,
+    )
+    return DataIngestion(config)
+
+
+def test_convert_to_parquet_reads_empty_cells_as_null(tmp_path):
+    ingestion = make_converter(tmp_path, "Fan,TariffRate,City,Company\n1,8.5,Surat,\n2,,,Tata Power\n3,7.0,Pune,Torrent\n")
+
+    frame = pq.read_table(ingestion.convert_to_parquet()).to_pandas()
+
+    assert frame["City"].isna().tolist() == [False, True, False]
+    assert frame["Company"].isna().tolist() == [True, False, False]
+    assert frame["TariffRate"].isna().tolist() == [False, True, False]
+    assert "" not in set(frame["City"].cat.categories)
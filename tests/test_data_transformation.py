@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import scipy.sparse as sp
+from src.ElectricityBill.components.data_transformation import DataTransformation
+from src.ElectricityBill.entity.config_entity import DataTransformationConfig
+
+
+NUMERICAL_COLS = ["Fan", "TariffRate"]
+CATEGORICAL_COLS = ["City"]
+TARGET = "ElectricityBill"
+
+
+def make_frame(n_rows: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Fan": rng.integers(0, 20, size=n_rows).astype("float64"),
+        "TariffRate": rng.choice([7.0, 7.5, 8.0, 8.5, 9.0], size=n_rows),
+        "City": rng.choice(["Pune", "Surat", "Delhi"], size=n_rows, p=[0.5, 0.3, 0.2]).astype(object),
+        TARGET: rng.normal(1000, 100, size=n_rows),
+    })
+    frame.loc[rng.choice(n_rows, size=30, replace=False), "Fan"] = np.nan
+    frame.loc[rng.choice(n_rows, size=20, replace=False), "City"] = None
+    return frame
+
+
+def make_transformation(tmp_path, chunk_size: int = 100) -> DataTransformation:
+    config = DataTransformationConfig(
+        root_dir=tmp_path,
+        data_path=tmp_path / "data.parquet",
+        numerical_cols=NUMERICAL_COLS,
+        categorical_cols=CATEGORICAL_COLS,
+        columns=NUMERICAL_COLS + CATEGORICAL_COLS + [TARGET],
+        target_column=TARGET,
+        fit_mode="streaming",
+        chunk_size=chunk_size,
+    )
+    return DataTransformation(config)
+
+
+def dense(X):
+    return X.toarray() if sp.issparse(X) else np.asarray(X)
+
+
+def test_streaming_fit_matches_in_memory_fit(tmp_path):
+    frame = make_frame()
+    transformation = make_transformation(tmp_path)
+    batches = pa.Table.from_pandas(frame, preserve_index=False).to_batches(max_chunksize=100)
+
+    streamed = transformation.fit_transformer_from_batches(batches)
+    in_memory = transformation.get_transformer_obj().fit(frame.drop(columns=[TARGET]))
+
+    assert streamed.get_feature_names_out().tolist() == in_memory.get_feature_names_out().tolist()
+    probe = pd.concat([frame.drop(columns=[TARGET]), pd.DataFrame([{"Fan": None, "TariffRate": None, "City": "Mumbai"}])], ignore_index=True)
+    np.testing.assert_allclose(dense(streamed.transform(probe)), dense(in_memory.transform(probe)), rtol=1e-9, atol=1e-9)
+
+
+def test_streaming_fit_rejects_all_null_categorical_column(tmp_path):
+    frame = make_frame()
+    frame["City"] = None
+    batches = pa.Table.from_pandas(frame, preserve_index=False).to_batches(max_chunksize=100)
+
+    with pytest.raises(ValueError, match="City"):
+        make_transformation(tmp_path).fit_transformer_from_batches(batches)
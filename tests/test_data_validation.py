@@ -0,0 +1,61 @@
+import json
+import pyarrow.parquet as pq
+from src.ElectricityBill.components.data_ingestion import DataIngestion
+from src.ElectricityBill.components.data_validation import DataValidation
+from src.ElectricityBill.entity.config_entity import DataIngestionConfig, DataValidationConfig
+
+
+SCHEMA = {"Fan": "int64", "TariffRate": "float64", "City": "object"}
+
+
+def ingest(tmp_path, csv_text):
+    csv_file = tmp_path / "data.csv"
+    csv_file.write_text(csv_text)
+    config = DataIngestionConfig(
+        root_dir=tmp_path,
+        source_URL="",
+        local_data_file=tmp_path / "data.zip",
+        unzip_dir=tmp_path,
+        csv_file=csv_file,
+        parquet_file=tmp_path / "data.parquet",
+        all_schema=SCHEMA,
+    )
+    return DataIngestion(config).convert_to_parquet()
+
+
+def validate(tmp_path, parquet_file):
+    config = DataValidationConfig(
+        root_dir=tmp_path,
+        STATUS_FILE=str(tmp_path / "status.txt"),
+        unzip_data_dir=parquet_file,
+        all_schema=SCHEMA,
+        constraints={},
+        report_file=tmp_path / "report.json",
+        fail_fast=False,
+    )
+    status = DataValidation(config).validate_all_columns()
+    with open(config.report_file) as f:
+        return status, json.load(f)["violations"]
+
+
+def test_valid_csv_passes_dtype_check(tmp_path):
+    parquet_file = ingest(tmp_path, "Fan,TariffRate,City\n1,8.5,Surat\n2,7.0,Pune\n")
+
+    status, violations = validate(tmp_path, parquet_file)
+
+    assert status is True
+    assert violations == []
+
+
+def test_unparsable_cells_are_dtype_violations(tmp_path):
+    parquet_file = ingest(tmp_path, "Fan,TariffRate,City\n1,8.5,Surat\ntwo,7.0,Pune\n3.5,high,Delhi\n4,6.5,Pune\n")
+
+    status, violations = validate(tmp_path, parquet_file)
+
+    assert status is False
+    by_column = {violation["column"]: violation for violation in violations if violation["check"] == "dtype"}
+    assert by_column["Fan"]["invalid_values"] == 2
+    assert by_column["Fan"]["examples"] == ["two", "3.5"]
+    assert by_column["TariffRate"]["invalid_values"] == 1
+    # The bad cells are stored as null, the rest of the column keeps its values
+    assert pq.read_table(parquet_file).column("Fan").to_pylist() == [1, None, None, 4]
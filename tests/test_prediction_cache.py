@@ -0,0 +1,97 @@
+import pytest
+from src.ElectricityBill.utils import prediction_cache
+from src.ElectricityBill.utils.prediction_cache import PredictionCache
+from src.ElectricityBill.pipelines.prediction_pipeline import PredictionPipeline
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    return clock
+
+
+def key(i: int) -> bytes:
+    return PredictionCache.make_key((float(i), "Pune"))
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    cache.put(key(1), 1.0)
+    cache.put(key(2), 2.0)
+    assert cache.get(key(1)) == 1.0
+
+    cache.put(key(3), 3.0)
+
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1)) == 1.0 and cache.get(key(3)) == 3.0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_the_cache():
+    cache = PredictionCache(max_entries=1000, max_bytes=3 * 300, ttl_seconds=0)
+    for i in range(20):
+        cache.put(key(i), float(i))
+
+    assert cache.bytes <= cache.max_bytes
+    assert len(cache.entries) < 20
+    assert cache.get(key(19)) == 19.0
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(ttl_seconds=10)
+    cache.put(key(1), 1.0)
+
+    clock.now += 9
+    assert cache.get(key(1)) == 1.0
+    clock.now += 2
+    assert cache.get(key(1)) is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_put_replaces_an_entry_without_leaking_bytes():
+    cache = PredictionCache(ttl_seconds=0)
+    cache.put(key(1), 1.0)
+    size = cache.bytes
+
+    cache.put(key(1), 2.0)
+
+    assert cache.bytes == size and cache.get(key(1)) == 2.0
+
+
+def make_pipeline() -> PredictionPipeline:
+    # Only the column lists are needed to build keys, no model or preprocessor is loaded
+    pipeline = PredictionPipeline.__new__(PredictionPipeline)
+    pipeline.feature_columns = ["Fan", "TariffRate", "City"]
+    pipeline.numeric_columns = {"Fan", "TariffRate"}
+    return pipeline
+
+
+def test_cache_key_is_stable_across_equivalent_records():
+    pipeline = make_pipeline()
+    base = pipeline.cache_key({"Fan": 3, "TariffRate": 8.5, "City": "Pune"})
+
+    assert pipeline.cache_key({"City": "Pune", "TariffRate": "8.5", "Fan": 3.0}) == base
+    assert pipeline.cache_key({"Fan": "3", "TariffRate": 8.5, "City": "Pune", "Extra": 1}) == base
+    assert pipeline.cache_key({"Fan": 4, "TariffRate": 8.5, "City": "Pune"}) != base
+    # None, NaN and a blank field are the same missing value
+    missing = pipeline.cache_key({"Fan": None, "TariffRate": 8.5, "City": "Pune"})
+    assert pipeline.cache_key({"Fan": float("nan"), "TariffRate": 8.5, "City": "Pune"}) == missing
+    assert pipeline.cache_key({"Fan": "", "TariffRate": 8.5, "City": "Pune"}) == missing
+
+
+def test_cache_key_is_none_for_records_that_cannot_be_normalized():
+    pipeline = make_pipeline()
+
+    assert pipeline.cache_key({"Fan": 3, "TariffRate": 8.5}) is None
+    assert pipeline.cache_key({"Fan": "three", "TariffRate": 8.5, "City": "Pune"}) is None
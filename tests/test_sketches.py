@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.ElectricityBill.utils.sketches import NumericSketch, CategoricalSketch
+
+
+def test_numeric_sketch_merge_matches_one_pass():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 50, size=1000).astype("float64")
+    values[rng.choice(1000, size=40, replace=False)] = np.nan
+
+    whole = NumericSketch().update(values)
+    merged = NumericSketch()
+    for chunk in np.array_split(values, 7):
+        merged.merge(NumericSketch().update(chunk))
+
+    valid = values[~np.isnan(values)]
+    for sketch in (whole, merged):
+        assert sketch.count == len(valid)
+        assert sketch.null_count == 40
+        assert sketch.min == valid.min() and sketch.max == valid.max()
+        assert sketch.mean == pytest.approx(valid.mean())
+        assert sketch.variance == pytest.approx(valid.var())
+        # Fewer distinct values than centroids, the quantiles are exact
+        assert sketch.quantile([0.1, 0.5, 0.9]) == pytest.approx(np.quantile(valid, [0.1, 0.5, 0.9]))
+
+
+def test_numeric_sketch_stays_bounded():
+    values = np.random.default_rng(1).normal(size=20000)
+    sketch = NumericSketch(max_centroids=64)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    assert len(sketch.values) <= 64
+    assert sketch.weights.sum() == len(values)
+    assert sketch.quantile(0.5) == pytest.approx(np.median(values), abs=0.05)
+
+
+def test_categorical_sketch_merge_counts_and_mode():
+    first = CategoricalSketch().update(pd.Series(["Pune", "Surat", None, "Pune"]))
+    second = CategoricalSketch().update(pd.Series(["Surat", "Surat", "Delhi", None]))
+
+    merged = first.merge(second)
+
+    assert merged.counts.to_dict() == {"Delhi": 1, "Pune": 2, "Surat": 3}
+    assert merged.null_count == 2
+    assert merged.categories() == ["Delhi", "Pune", "Surat"]
+    assert merged.most_frequent() == "Surat"
+
+
+def test_categorical_sketch_breaks_ties_like_simple_imputer():
+    sketch = CategoricalSketch().update(pd.Series(["b", "a", "b", "a"]))
+
+    assert sketch.most_frequent() == "a"
+    assert CategoricalSketch().most_frequent() is None